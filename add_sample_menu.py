@@ -1,5 +1,8 @@
-from app import app, db
+from app import create_app
 from models import User, Category, MenuItem
+from menu_import import import_menu
+
+app = create_app(web=False)
 
 def add_sample_menu():
     with app.app_context():
@@ -59,23 +62,9 @@ def add_sample_menu():
              'description': 'Cool and refreshing chaas'},
         ]
         
-        added_count = 0
-        for item_data in sample_items:
-            category = Category.query.filter_by(name=item_data['category']).first()
-            if category:
-                item = MenuItem(
-                    name=item_data['name'],
-                    description=item_data['description'],
-                    price=item_data['price'],
-                    category_id=category.id,
-                    vendor_id=vendor.id,
-                    is_available=True
-                )
-                db.session.add(item)
-                added_count += 1
-        
-        db.session.commit()
-        print(f'✓ Successfully added {added_count} sample menu items!')
+        # One validated bulk upsert instead of a query and insert per item
+        result = import_menu(sample_items, vendor_id=vendor.id)
+        print(f"✓ Successfully added {result['created']} sample menu items!")
         print('─' * 40)
         print('Menu items added to categories:')
         for cat in categories:
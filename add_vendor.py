@@ -1,5 +1,9 @@
-from app import app, db
-from models import User
+import csv
+import sys
+from app import create_app
+from models import db, User
+
+app = create_app(web=False)
 
 def add_vendor():
     with app.app_context():
@@ -26,5 +30,36 @@ def add_vendor():
             print('✗ Vendor already exists')
             print('Email: vendor@somaiya.edu')
 
+def add_vendors(path):
+    """Onboard many vendors from a CSV with email, full_name, phone, password columns"""
+    with app.app_context():
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+
+        # One lookup for every existing account instead of one per row
+        emails = {row['email'].strip().lower() for row in rows}
+        existing = {email.lower() for (email,) in db.session.query(User.email).filter(
+            db.func.lower(User.email).in_(emails))}
+
+        vendors = []
+        for row in rows:
+            email = row['email'].strip().lower()
+            if email in existing:
+                print(f'✗ {email} already exists')
+                continue
+            existing.add(email)
+            vendor = User(email=email, full_name=row['full_name'].strip(),
+                          phone=row['phone'].strip(), role='vendor')
+            vendor.set_password(row['password'])
+            vendors.append(vendor)
+
+        db.session.add_all(vendors)
+        db.session.commit()
+        print(f'✓ Created {len(vendors)} vendors')
+        print('  Next: python menu_import.py menus.csv (rows carry vendor_email)')
+
 if __name__ == '__main__':
-    add_vendor()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        add_vendors(sys.argv[1])
+    else:
+        add_vendor()
\ No newline at end of file
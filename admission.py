@@ -0,0 +1,261 @@
+"""
+Admission control for write routes
+At rush peaks every checkout and cart update competes for the single
+SQLite writer. @admission_controlled admits a request only when the
+student's and the vendor's token buckets have a token and fewer than
+max_concurrent write requests are in flight. Everyone else joins a FIFO
+waiting line and gets a light "you're in line, position N" reply (429):
+JSON for fetch() calls, a waiting room page for form posts. As capacity
+frees up, the students at the front are called with an admission_ready
+SocketIO event and their browsers retry; a called student has
+ADMISSION_PASS_SECONDS to come back before the next one is called.
+
+Limits start from config and can be changed while the app runs:
+
+    flask --app "app:create_app(web=False)" admission set --max-concurrent 4
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import click
+from flask import current_app, request, jsonify, render_template
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy.exc import OperationalError
+from models import db, Setting
+
+LIMITS = {
+    'enabled': 'ADMISSION_ENABLED',
+    'max_concurrent': 'ADMISSION_MAX_CONCURRENT',
+    'user_rate': 'ADMISSION_USER_RATE',
+    'user_burst': 'ADMISSION_USER_BURST',
+    'vendor_rate': 'ADMISSION_VENDOR_RATE',
+    'vendor_burst': 'ADMISSION_VENDOR_BURST'
+}
+SETTING_KEY = 'admission'
+
+class TokenBuckets:
+    """Token bucket per key; rate and burst are passed on each call so limit changes apply at once"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, last refill]
+
+    def _bucket(self, key, rate, burst, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)  # Least recently used; it was probably full anyway
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+
+    def available(self, key, rate, burst, now):
+        return self._bucket(key, rate, burst, now)[0] >= 1
+
+    def take(self, key, rate, burst, now):
+        bucket = self._bucket(key, rate, burst, now)
+        bucket[0] -= 1
+
+    def wait(self, key, rate, burst, now):
+        """Seconds until the bucket holds a token"""
+        tokens = self._bucket(key, rate, burst, now)[0]
+        return 0 if tokens >= 1 else (1 - tokens) / rate if rate > 0 else 60
+
+class AdmissionController:
+    def __init__(self):
+        self.configured = {}
+        self.limits = {}
+        self.in_flight = 0
+        self.line = OrderedDict()  # user_id -> (vendor_id, room, last seen)
+        self.passes = {}  # user_id -> expiry of their turn
+        self.buckets = TokenBuckets()
+        self.admitted = 0
+        self.queued = 0
+        self._lock = threading.Lock()
+        self._notify = None
+
+    def init_app(self, app, notify):
+        """notify(room) tells a waiting student it is their turn"""
+        self.configured = {name: app.config[key] for name, key in LIMITS.items()}
+        self.limits = dict(self.configured)
+        self.pass_seconds = app.config['ADMISSION_PASS_SECONDS']
+        self.line_seconds = app.config['ADMISSION_LINE_SECONDS']
+        self._notify = notify
+
+    def apply(self, overrides):
+        """Replace the runtime overrides of the configured limits"""
+        limits = dict(self.configured)
+        limits.update({name: value for name, value in overrides.items() if name in LIMITS})
+        self.limits = limits
+        self.pump()
+
+    def try_admit(self, user_id, vendor_id, room):
+        """Admit a request, or return (position, retry_after) to wait in line; position 0 means
+        the student is only over their own rate"""
+        limits = self.limits
+        now = time.monotonic()
+        with self._lock:
+            has_pass = self.passes.pop(user_id, 0) > now
+            user_key = f'user:{user_id}'
+            if not has_pass and not self.buckets.available(user_key, limits['user_rate'], limits['user_burst'], now):
+                return 0, self.buckets.wait(user_key, limits['user_rate'], limits['user_burst'], now)
+
+            vendor_key = f'vendor:{vendor_id}'
+            busy = self.in_flight + len(self.passes) >= limits['max_concurrent']
+            if busy or not self.buckets.available(vendor_key, limits['vendor_rate'], limits['vendor_burst'], now) \
+                    or (self.line and not has_pass):
+                self.line[user_id] = (vendor_id, room, now)  # Keeps an existing place in line
+                if has_pass:
+                    self.line.move_to_end(user_id, last=False)  # Called but beaten to capacity: stay at the front
+                self.queued += 1
+                position = list(self.line).index(user_id) + 1
+                return position, min(self.line_seconds / 2, 1 + position * 0.5)
+
+            self.line.pop(user_id, None)
+            self.buckets.take(user_key, limits['user_rate'], limits['user_burst'], now)
+            self.buckets.take(vendor_key, limits['vendor_rate'], limits['vendor_burst'], now)
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self.pump()
+
+    def pump(self):
+        """Call students from the front of the line while there is capacity for them"""
+        limits = self.limits
+        now = time.monotonic()
+        called = []
+        with self._lock:
+            self.passes = {user_id: expires for user_id, expires in self.passes.items() if expires > now}
+            free = limits['max_concurrent'] - self.in_flight - len(self.passes)
+            for user_id, (vendor_id, room, seen) in list(self.line.items()):
+                if seen < now - self.line_seconds:
+                    del self.line[user_id]  # Stopped retrying; left the page
+                    continue
+                if free <= 0:
+                    break
+                if not self.buckets.available(f'vendor:{vendor_id}', limits['vendor_rate'],
+                                              limits['vendor_burst'], now):
+                    continue  # Busy vendor; students of other vendors go ahead
+                del self.line[user_id]
+                self.passes[user_id] = now + self.pass_seconds
+                called.append(room)
+                free -= 1
+        for room in called:
+            self._notify(room)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limits': dict(self.limits),
+                'in_flight': self.in_flight,
+                'waiting': len(self.line),
+                'called': len(self.passes),
+                'admitted': self.admitted,
+                'queued': self.queued
+            }
+
+admission = AdmissionController()
+
+def load_overrides():
+    """Runtime limit overrides saved with `flask admission set`"""
+    setting = db.session.get(Setting, SETTING_KEY)
+    return json.loads(setting.value) if setting else {}
+
+def start_admission_pump(app, socketio):
+    """Call waiting students as tokens refill and pick up limit changes"""
+    def loop():
+        refreshed = 0
+        while True:
+            if time.monotonic() - refreshed >= app.config['ADMISSION_REFRESH_SECONDS']:
+                refreshed = time.monotonic()
+                with app.app_context():
+                    try:
+                        admission.apply(load_overrides())
+                    except OperationalError:
+                        db.session.rollback()  # Busy, or no settings table yet
+                    finally:
+                        db.session.remove()
+            admission.pump()
+            socketio.sleep(0.25)
+
+    socketio.start_background_task(loop)
+
+def admission_controlled(vendor_of):
+    """Hold a write route behind the admission controller
+    vendor_of() returns the vendor the request writes for.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not admission.limits.get('enabled'):
+                return f(*args, **kwargs)
+            waiting = admission.try_admit(current_user.id, vendor_of(), f'{current_user.role}_{current_user.id}')
+            if waiting is not None:
+                return waiting_response(*waiting)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                admission.release()
+        return wrapper
+    return decorator
+
+def waiting_response(position, retry_after):
+    retry_after = round(retry_after, 1)
+    if position:
+        message = f"You're in line, position {position}. We'll place your request automatically."
+    else:
+        message = 'Slow down a little, retrying in a moment.'
+    if request.is_json:
+        response = jsonify({'success': False, 'queued': True, 'position': position,
+                            'retry_after': retry_after, 'message': message})
+    else:
+        # Form posts: a waiting room page that resubmits the same form
+        response = current_app.make_response(render_template(
+            'waiting_room.html', position=position, retry_after=retry_after, message=message,
+            action=request.path, fields=request.form.items(multi=True)))
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, round(retry_after)))
+    return response
+
+admission_cli = AppGroup('admission', help='Admission control for write routes.')
+
+@admission_cli.command('show')
+def show_command():
+    """Show the limits in effect (config plus runtime overrides)."""
+    overrides = load_overrides()
+    for name, key in LIMITS.items():
+        value = overrides.get(name, current_app.config[key])
+        click.echo(f'{name:<16}{value!s:>8}{"  (override)" if name in overrides else ""}')
+
+@admission_cli.command('set')
+@click.option('--enabled/--disabled', default=None)
+@click.option('--max-concurrent', type=int)
+@click.option('--user-rate', type=float, help='Requests per second per student.')
+@click.option('--user-burst', type=int)
+@click.option('--vendor-rate', type=float, help='Requests per second per vendor.')
+@click.option('--vendor-burst', type=int)
+@click.option('--reset', is_flag=True, help='Drop all overrides and use config values.')
+def set_command(reset, **limits):
+    """Override limits; running web processes apply them within ADMISSION_REFRESH_SECONDS."""
+    db.create_all()
+    overrides = {} if reset else load_overrides()
+    overrides.update({name: value for name, value in limits.items() if value is not None})
+    setting = db.session.get(Setting, SETTING_KEY) or Setting(key=SETTING_KEY)
+    setting.value = json.dumps(overrides)
+    db.session.add(setting)
+    db.session.commit()
+    click.echo(f'✓ Admission overrides: {overrides or "none"}')
+
+def init_admission(app):
+    app.cli.add_command(admission_cli)
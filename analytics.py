@@ -0,0 +1,200 @@
+"""
+Dashboard and analytics queries
+Kept free of the web layer so benchmarks and scripts can call them with
+only an app context. The heavy ones run off the eventlet hub via @offload_db.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, User, MenuItem, Order
+from utils import get_available_time_slots
+from db_offload import offload_db
+from archive import get_archived_totals, order_line_history
+from order_events import latency_aggregator
+from trending import trending_items
+
+ORDER_EXPORT_COLUMNS = ['order_number', 'created_at', 'pickup_time', 'order_status', 'payment_method',
+                        'payment_status', 'order_total', 'item_name', 'quantity', 'unit_price', 'line_total']
+
+def get_order_export_rows(vendor_id, start=None, end=None, status='all', batch_size=500):
+    """Yield order line items for export, fetched in batches from a server-side cursor"""
+    lines = order_line_history()  # Live and archived orders
+    query = db.session.query(lines).filter(lines.c.vendor_id == vendor_id)
+    
+    if start:
+        query = query.filter(lines.c.created_at >= start)
+    if end:
+        query = query.filter(lines.c.created_at < end + timedelta(days=1))  # Inclusive end date
+    if status != 'all':
+        query = query.filter(lines.c.order_status == status)
+    
+    query = query.order_by(lines.c.created_at, lines.c.order_id, lines.c.item_id).yield_per(batch_size)
+    
+    for row in query:
+        yield (row.order_number, row.created_at.strftime('%Y-%m-%d %H:%M:%S'), row.pickup_time,
+               row.order_status, row.payment_method, row.payment_status, row.total_amount,
+               row.name, row.quantity, row.price, round(row.quantity * row.price, 2))
+
+def get_low_stock_items(vendor_id):
+    """Get tracked items at or below their stock threshold"""
+    items = db.session.query(
+        MenuItem.name,
+        MenuItem.stock_quantity,
+        MenuItem.stock_threshold
+    ).filter(
+        MenuItem.vendor_id == vendor_id,
+        MenuItem.stock_quantity.isnot(None),
+        MenuItem.stock_quantity <= MenuItem.stock_threshold
+    ).order_by(MenuItem.stock_quantity).all()
+    
+    return [{'name': item.name, 'stock': item.stock_quantity, 'threshold': item.stock_threshold}
+            for item in items]
+
+@offload_db
+def get_peak_hours_today(vendor_id):
+    """Get order count by hour for today"""
+    today = datetime.now().date()
+    
+    orders = db.session.query(
+        func.strftime('%H', Order.created_at).label('hour'),
+        func.count(Order.id).label('count')
+    ).filter(
+        Order.vendor_id == vendor_id,
+        func.date(Order.created_at) == today
+    ).group_by('hour').all()
+    
+    hours_data = {str(i).zfill(2): 0 for i in range(24)}
+    for order in orders:
+        hours_data[order.hour] = order.count
+    
+    return hours_data
+
+@offload_db
+def get_peak_hours_weekly(vendor_id):
+    """Get order count by hour for past week"""
+    week_ago = datetime.now() - timedelta(days=7)
+    
+    orders = db.session.query(
+        func.strftime('%H', Order.created_at).label('hour'),
+        func.count(Order.id).label('count')
+    ).filter(
+        Order.vendor_id == vendor_id,
+        Order.created_at >= week_ago
+    ).group_by('hour').all()
+    
+    return [{'hour': o.hour, 'count': o.count} for o in orders]
+
+@offload_db
+def get_slot_utilization(vendor_id):
+    """Get today's slot booking statistics"""
+    today = datetime.now().date()
+    
+    slot_config = User.query.get(vendor_id).get_slot_config()
+    time_slots = get_available_time_slots()
+    
+    total_slots = 0
+    booked_slots = 0
+    
+    for slot in time_slots:
+        capacity = 20  # Default
+        if slot in slot_config:
+            if slot_config[slot].get('blackout', False):
+                continue
+            capacity = slot_config[slot].get('capacity', 20)
+        
+        booked = Order.query.filter_by(
+            vendor_id=vendor_id,
+            pickup_time=slot
+        ).filter(Order.holding_slot(), func.date(Order.created_at) == today).count()
+        
+        total_slots += capacity
+        booked_slots += booked
+    
+    utilization = (booked_slots / total_slots * 100) if total_slots > 0 else 0
+    
+    return {
+        'total': total_slots,
+        'booked': booked_slots,
+        'utilization': round(utilization, 1)
+    }
+
+@offload_db
+def get_detailed_slot_utilization(vendor_id):
+    """Get detailed slot utilization for analytics"""
+    today = datetime.now().date()
+    slot_config = User.query.get(vendor_id).get_slot_config()
+    time_slots = get_available_time_slots()
+    
+    slots_data = []
+    for slot in time_slots:
+        capacity = 20
+        if slot in slot_config:
+            if slot_config[slot].get('blackout', False):
+                continue
+            capacity = slot_config[slot].get('capacity', 20)
+        
+        booked = Order.query.filter_by(
+            vendor_id=vendor_id,
+            pickup_time=slot
+        ).filter(Order.holding_slot(), func.date(Order.created_at) == today).count()
+        
+        utilization = (booked / capacity * 100) if capacity > 0 else 0
+        
+        slots_data.append({
+            'time': slot,
+            'capacity': capacity,
+            'booked': booked,
+            'utilization': round(utilization, 1)
+        })
+    
+    return slots_data
+
+@offload_db
+def calculate_waste_prevented(vendor_id):
+    """Calculate waste prevented through pre-ordering"""
+    total_orders = Order.query.filter_by(vendor_id=vendor_id).count() + \
+        get_archived_totals(vendor_id)['order_count']
+    
+    # Estimate: Each pre-order prevents 250g of waste
+    kg_saved = total_orders * 0.25
+    
+    today_orders = Order.query.filter_by(vendor_id=vendor_id).filter(
+        func.date(Order.created_at) == datetime.now().date()
+    ).count()
+    
+    today_kg_saved = today_orders * 0.25
+    
+    return {
+        'total_orders': total_orders,
+        'total_kg_saved': round(kg_saved, 2),
+        'today_orders': today_orders,
+        'today_kg_saved': round(today_kg_saved, 2)
+    }
+
+@offload_db
+def get_detailed_waste_metrics(vendor_id):
+    """Get detailed waste prevention metrics"""
+    week_ago = datetime.now() - timedelta(days=7)
+    
+    weekly_orders = Order.query.filter_by(vendor_id=vendor_id).filter(
+        Order.created_at >= week_ago
+    ).count()
+    
+    weekly_kg_saved = weekly_orders * 0.25
+    
+    return {
+        'weekly_orders': weekly_orders,
+        'weekly_kg_saved': round(weekly_kg_saved, 2),
+        'message': 'Smart scheduling helps canteens prepare exact quantities, reducing stale food and leftovers'
+    }
+
+def get_popular_items(vendor_id):
+    """Most ordered menu items today, from the in-memory trending sketches"""
+    return [{'name': item['name'], 'total_sold': item['count']}
+            for item in trending_items(vendor_id, 'today', n=10)]
+
+@offload_db
+def get_prep_latency(vendor_id):
+    """Time-to-ready and ready-to-pickup percentiles, overall and per slot"""
+    latency_aggregator.consume()
+    return latency_aggregator.report(vendor_id)
@@ -0,0 +1,150 @@
+"""
+Hot/cold order archival
+Moves picked up, cancelled and expired orders older than ARCHIVE_AFTER_DAYS
+out of the live order tables into archive tables, folding them into
+per-vendor daily rollups so totals stay correct. Run this script periodically.
+"""
+
+from datetime import datetime, date, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, delete, func, case, literal, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Order, OrderItem, MenuItem, ArchivedOrder, ArchivedOrderItem, OrderRollup
+
+ARCHIVABLE_STATUSES = ('picked_up', 'cancelled', 'expired')
+PAID_STATUSES = ('paid', 'cod')
+
+def archive_orders(older_than_days=None, batch_size=500):
+    """Move completed orders older than the cutoff into the archive
+    Each batch is copied, rolled up and deleted in one transaction.
+    Returns the number of orders archived.
+    """
+    if older_than_days is None:
+        older_than_days = current_app.config['ARCHIVE_AFTER_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    archived = 0
+    while True:
+        order_ids = db.session.scalars(
+            select(Order.id).where(
+                Order.order_status.in_(ARCHIVABLE_STATUSES),
+                Order.updated_at < cutoff
+            ).order_by(Order.id).limit(batch_size)
+        ).all()
+        if not order_ids:
+            break
+
+        _archive_batch(order_ids)
+        db.session.commit()
+        archived += len(order_ids)
+
+    return archived
+
+def _archive_batch(order_ids):
+    """Copy, roll up and delete one batch of orders"""
+    now = datetime.utcnow()
+    order_columns = [c.name for c in Order.__table__.columns]
+    item_columns = [c.name for c in OrderItem.__table__.columns]
+
+    db.session.execute(insert(ArchivedOrder.__table__).from_select(
+        order_columns + ['archived_at'],
+        select(*[Order.__table__.c[name] for name in order_columns],
+               literal(now, type_=db.DateTime)).where(Order.id.in_(order_ids))
+    ))
+    db.session.execute(insert(ArchivedOrderItem.__table__).from_select(
+        item_columns,
+        select(*[OrderItem.__table__.c[name] for name in item_columns]).where(OrderItem.order_id.in_(order_ids))
+    ))
+
+    rollups = db.session.query(
+        Order.vendor_id,
+        func.date(Order.created_at).label('day'),
+        func.count(Order.id).label('order_count'),
+        func.sum(case((Order.order_status == 'picked_up', 1), else_=0)).label('picked_up_count'),
+        func.sum(case((Order.order_status == 'cancelled', 1), else_=0)).label('cancelled_count'),
+        func.sum(case((Order.payment_status.in_(PAID_STATUSES), Order.total_amount), else_=0)).label('revenue')
+    ).filter(Order.id.in_(order_ids)).group_by(Order.vendor_id, 'day').all()
+
+    for rollup in rollups:
+        stmt = sqlite_insert(OrderRollup).values(
+            vendor_id=rollup.vendor_id,
+            day=date.fromisoformat(rollup.day),
+            order_count=rollup.order_count,
+            picked_up_count=rollup.picked_up_count,
+            cancelled_count=rollup.cancelled_count,
+            revenue=rollup.revenue or 0
+        )
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['vendor_id', 'day'],
+            set_={
+                'order_count': OrderRollup.order_count + stmt.excluded.order_count,
+                'picked_up_count': OrderRollup.picked_up_count + stmt.excluded.picked_up_count,
+                'cancelled_count': OrderRollup.cancelled_count + stmt.excluded.cancelled_count,
+                'revenue': OrderRollup.revenue + stmt.excluded.revenue
+            }
+        ))
+
+    db.session.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+    db.session.execute(delete(Order).where(Order.id.in_(order_ids)))
+
+# Historical queries spanning both stores
+def get_student_order_history(student_id):
+    """Get a student's live and archived orders, newest first"""
+    live = Order.query.filter_by(student_id=student_id).order_by(Order.created_at.desc()).all()
+    archived = ArchivedOrder.query.filter_by(student_id=student_id).order_by(ArchivedOrder.created_at.desc()).all()
+    return sorted(live + archived, key=lambda o: o.created_at, reverse=True)
+
+def count_student_orders(student_id):
+    """Count a student's live and archived orders"""
+    return (Order.query.filter_by(student_id=student_id).count() +
+            ArchivedOrder.query.filter_by(student_id=student_id).count())
+
+def get_archived_totals(vendor_id):
+    """Get order count and revenue of a vendor's archived orders from rollups"""
+    totals = db.session.query(
+        func.coalesce(func.sum(OrderRollup.order_count), 0).label('order_count'),
+        func.coalesce(func.sum(OrderRollup.revenue), 0).label('revenue')
+    ).filter(OrderRollup.vendor_id == vendor_id).one()
+    return {'order_count': totals.order_count, 'revenue': totals.revenue}
+
+def order_history(*columns):
+    """Union of the named Order columns across live and archived orders"""
+    return union_all(
+        select(*[Order.__table__.c[name] for name in columns]),
+        select(*[ArchivedOrder.__table__.c[name] for name in columns])
+    ).subquery('order_history')
+
+def order_line_history():
+    """Union of order line items joined with their menu item across both stores"""
+    def lines(order, item):
+        return select(
+            order.id.label('order_id'),
+            order.vendor_id,
+            order.order_number,
+            order.created_at,
+            order.pickup_time,
+            order.order_status,
+            order.payment_method,
+            order.payment_status,
+            order.total_amount,
+            MenuItem.name,
+            item.id.label('item_id'),
+            item.quantity,
+            item.price
+        ).join(item, item.order_id == order.id).join(MenuItem, item.menu_item_id == MenuItem.id)
+
+    return union_all(
+        lines(Order, OrderItem),
+        lines(ArchivedOrder, ArchivedOrderItem)
+    ).subquery('order_line_history')
+
+if __name__ == '__main__':
+    from app import create_app
+    from order_events import purge_order_events
+
+    app = create_app(web=False)
+    with app.app_context():
+        db.create_all()
+        count = archive_orders()
+        print(f'✓ Archived {count} orders')
+        print(f'✓ Purged {purge_order_events()} order events')
@@ -0,0 +1,137 @@
+"""
+Fingerprinted, precompressed static assets
+Run this script to build static/dist: copies of the CSS, JS and SVG
+icons (CSS and SVG minified) with content hashes in their names, gzip
+and brotli variants, and a manifest.json mapping logical names to built
+files. Templates use
+asset_url('css/style.css'); without a build it falls back to the plain
+static file, so development needs no build step.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import current_app, request, send_from_directory, url_for, abort
+
+SOURCE_PATTERNS = {'css': '.css', 'js': '.js', 'icons': '.svg'}
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_manifest = None
+
+# Minifiers (conservative: whitespace and comments only)
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+def minify_svg(text):
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    return re.sub(r'>\s+<', '><', text).strip()
+
+# JS is copied as is: telling comments from string, template and regex
+# contents needs a real parser, and gzip/brotli already remove most of the gain
+MINIFIERS = {'.css': minify_css, '.svg': minify_svg}
+
+def build_assets(static_folder):
+    """Build minified, hashed and compressed assets plus the manifest"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print('✗ brotli not installed, skipping .br variants')
+
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+
+    for folder, extension in SOURCE_PATTERNS.items():
+        source_dir = os.path.join(static_folder, folder)
+        if not os.path.isdir(source_dir):
+            continue
+        for name in sorted(os.listdir(source_dir)):
+            if not name.endswith(extension):
+                continue
+            with open(os.path.join(source_dir, name), encoding='utf-8') as f:
+                content = f.read()
+            minify = MINIFIERS.get(extension)
+            content = (minify(content) if minify else content).encode('utf-8')
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            stem = name[:-len(extension)]
+            built = f'{folder}/{stem}.{digest}{extension}'
+            target = os.path.join(dist, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            with open(target, 'wb') as f:
+                f.write(content)
+            with open(target + '.gz', 'wb') as f:
+                f.write(gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli:
+                with open(target + '.br', 'wb') as f:
+                    f.write(brotli.compress(content, quality=11))
+
+            manifest[f'{folder}/{name}'] = built
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest():
+    """Load the build manifest once (on every call in debug mode)"""
+    global _manifest
+    if _manifest is None or current_app.debug:
+        path = os.path.join(current_app.static_folder, DIST_DIR, MANIFEST)
+        try:
+            with open(path) as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+def asset_url(name):
+    """URL of the built asset for a logical static path"""
+    built = load_manifest().get(name)
+    if built:
+        return url_for('serve_asset', filename=built)
+    return url_for('static', filename=name)
+
+def serve_asset(filename):
+    """Serve a built asset, preferring a precompressed variant"""
+    dist = os.path.join(current_app.static_folder, DIST_DIR)
+    if filename == MANIFEST:
+        abort(404)
+
+    accepted = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding] and os.path.isfile(os.path.join(dist, filename + suffix)):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(dist, filename + suffix, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist, filename, max_age=IMMUTABLE_MAX_AGE)
+
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def init_assets(app):
+    app.add_url_rule('/assets/<path:filename>', 'serve_asset', serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+if __name__ == '__main__':
+    static_folder = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'static')
+    manifest = build_assets(static_folder)
+    print(f'✓ Built {len(manifest)} assets into static/{DIST_DIR}')
+    for name, built in manifest.items():
+        print(f'  • {name} -> {built}')
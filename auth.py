@@ -0,0 +1,90 @@
+"""
+Authentication blueprint: signup, login, logout and role-based access control
+"""
+
+from functools import wraps
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask_login import login_user, logout_user, login_required, current_user
+from models import db, User
+from forms import SignupForm, LoginForm
+from identity import identity_cache
+
+bp = Blueprint('auth', __name__)
+
+# Role-based access control decorator
+def role_required(role):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_user.is_authenticated or current_user.role != role:
+                flash('Access denied. You do not have permission to view this page.', 'danger')
+                return redirect(url_for('auth.login'))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+@bp.route('/')
+def index():
+    if current_user.is_authenticated:
+        if current_user.role == 'student':
+            return redirect(url_for('student.student_home'))
+        elif current_user.role == 'vendor':
+            return redirect(url_for('vendor.vendor_dashboard'))
+    return redirect(url_for('auth.login'))
+
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if current_user.is_authenticated:
+        return redirect(url_for('auth.index'))
+    
+    form = SignupForm()
+    if form.validate_on_submit():
+        user = User(
+            email=form.email.data,
+            full_name=form.full_name.data,
+            phone=form.phone.data,
+            role='student'  # Default role
+        )
+        user.set_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        flash('Account created successfully! Please login.', 'success')
+        return redirect(url_for('auth.login'))
+    
+    return render_template('signup.html', form=form)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('auth.index'))
+    
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+        if user and user.check_password(form.password.data):
+            # Upgrade hashes made with an older work factor
+            if user.password_needs_rehash():
+                user.set_password(form.password.data)
+                db.session.commit()
+            
+            identity_cache.put(user)  # Warm the cache for the next request
+            login_user(user, remember=form.remember_me.data)
+            next_page = request.args.get('next')
+            if next_page:
+                return redirect(next_page)
+            
+            if user.role == 'student':
+                return redirect(url_for('student.student_home'))
+            elif user.role == 'vendor':
+                return redirect(url_for('vendor.vendor_dashboard'))
+        else:
+            flash('Invalid email or password', 'danger')
+    
+    return render_template('login.html', form=form)
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('Logged out successfully', 'info')
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,144 @@
+"""
+Analytics helper micro-benchmarks
+Times the dashboard and analytics helpers for the busiest vendor against
+generated histories of 10k, 100k and 1M orders (built once by
+generate_history.py and cached in benchmarks/.data). Each helper's median
+is compared with analytics_baseline.json and the run exits non-zero when
+one is slower than baseline by more than the tolerance. Baselines are
+machine-specific: refresh them with --update-baseline after intended
+changes or on new hardware.
+
+Usage: python benchmarks/analytics_bench.py [--sizes 10000 100000 1000000] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'analytics_baseline.json')
+DEFAULT_SIZES = [10000, 100000, 1000000]
+# analytics helpers, plus the benchmark's own functions below; get_popular_items reads
+# an in-memory sketch, so its database cost is timed as trending_warm instead
+HELPERS = [
+    'get_peak_hours_today',
+    'get_peak_hours_weekly',
+    'trending_warm',
+    'get_low_stock_items',
+    'calculate_waste_prevented',
+    'get_slot_utilization'
+]
+
+def trending_warm(vendor_id):
+    """get_popular_items in a fresh process: replay today's orders into new sketches"""
+    from trending import TrendingTracker
+    return TrendingTracker().top(vendor_id, 'today', 10)
+
+def dataset_path(data_dir, orders):
+    """Generate (once) and return the history file for a size"""
+    path = os.path.join(data_dir, f'history_{orders}.db')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'generate_history.py'), path,
+                        '--orders', str(orders)], check=True)
+    return path
+
+def measure(path, repeats):
+    """Time every helper against one database; runs in its own process"""
+    import config
+    config.Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    import analytics
+    from app import create_app
+    from sqlalchemy import func
+    from models import db, Order, add_missing_columns
+
+    # web=False also skips the thread pool hand-off, timing the queries themselves
+    app = create_app(web=False)
+
+    results = {}
+    with app.app_context():
+        add_missing_columns()  # Datasets are cached across schema changes
+        vendor_id = db.session.query(Order.vendor_id).group_by(Order.vendor_id).order_by(
+            func.count(Order.id).desc()).limit(1).scalar()
+        for name in HELPERS:
+            helper = getattr(analytics, name, None) or globals()[name]
+            helper(vendor_id)  # Warm the page cache
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                helper(vendor_id)
+                timings.append(time.perf_counter() - started)
+                db.session.remove()
+            results[name] = statistics.median(timings)
+    return results
+
+def compare(size, results, baseline, tolerance, min_delta):
+    """Print a table for one size and return the helpers that regressed"""
+    regressions = []
+    print(f'\n{size:,} orders')
+    print(f'{"helper":<28}{"median ms":>12}{"baseline ms":>14}{"change":>10}')
+    for name, seconds in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            print(f'{name:<28}{seconds * 1000:>12.2f}{"-":>14}{"":>10}')
+            continue
+        change = (seconds - expected) / expected if expected else 0
+        regressed = seconds > expected * (1 + tolerance) and seconds - expected > min_delta
+        flag = '  ✗' if regressed else ''
+        print(f'{name:<28}{seconds * 1000:>12.2f}{expected * 1000:>14.2f}{change:>+10.0%}{flag}')
+        if regressed:
+            regressions.append(f'{name} @ {size:,}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown as a fraction of baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore slowdowns smaller than this')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, '.data'))
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeats)))
+        return
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+
+    regressions = []
+    for size in args.sizes:
+        path = dataset_path(args.data_dir, size)
+        # Fresh process per size so one dataset's page cache cannot flatter the next
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', path,
+                                 '--repeats', str(args.repeats)], check=True, capture_output=True, text=True).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+
+        if args.update_baseline:
+            baselines[str(size)] = {name: round(seconds, 6) for name, seconds in results.items()}
+        regressions += compare(size, results, baselines.get(str(size), {}),
+                               args.tolerance, args.min_delta_ms / 1000)
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\n✓ Baseline written to {BASELINE_PATH}')
+    elif regressions:
+        print(f'\n✗ Regressed past baseline: {", ".join(regressions)}')
+        sys.exit(1)
+    else:
+        print('\n✓ No regressions')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Cold-start check for the application factory
+Starts fresh interpreters that build the app with create_app(web=False),
+as maintenance scripts and CLI commands do, and with the full web stack.
+Reports the median start time and the heavy modules each mode imported.
+Exits non-zero if a lazily imported module (razorpay, qrcode, PIL) was
+loaded at startup, if script mode pulled in the web layer, or if a mode
+went over its time budget.
+
+Usage: python benchmarks/cold_start.py [--runs 7] [--script-budget-ms 800] [--web-budget-ms 2500]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median start-up budgets; a mode over its budget fails the check
+SCRIPT_BUDGET_MS = 800
+WEB_BUDGET_MS = 2500
+
+LAZY_MODULES = ['razorpay', 'qrcode', 'PIL', 'numpy']
+WEB_MODULES = ['eventlet', 'flask_socketio', 'flask_wtf', 'auth', 'student', 'vendor']
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app(web={web})
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'modules': [m for m in {modules!r} if m in sys.modules]}}))
+'''
+
+def probe(web):
+    """Build the app in a fresh interpreter; returns (seconds, loaded heavy modules)"""
+    code = PROBE.format(web=web, modules=LAZY_MODULES + WEB_MODULES)
+    process = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if process.returncode != 0:
+        print(process.stderr, file=sys.stderr)
+        sys.exit(f'✗ create_app(web={web}) failed')
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    return result['seconds'], result['modules']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--script-budget-ms', type=float, default=SCRIPT_BUDGET_MS)
+    parser.add_argument('--web-budget-ms', type=float, default=WEB_BUDGET_MS)
+    args = parser.parse_args()
+
+    failures = []
+    print(f'{"mode":<10}{"median ms":>12}{"max ms":>10}{"budget ms":>12}  heavy modules loaded')
+    for web, budget in ((False, args.script_budget_ms), (True, args.web_budget_ms)):
+        probe(web)  # Warm the OS file cache and bytecode
+        timings, modules = [], []
+        for _ in range(args.runs):
+            seconds, modules = probe(web)
+            timings.append(seconds * 1000)
+        median = statistics.median(timings)
+        mode = 'web' if web else 'script'
+        print(f'{mode:<10}{median:>12.1f}{max(timings):>10.1f}{budget:>12.0f}  {", ".join(modules) or "-"}')
+
+        lazy = [m for m in modules if m in LAZY_MODULES]
+        if lazy:
+            failures.append(f'{mode} imported {", ".join(lazy)} at startup')
+        if not web and modules:
+            failures.append(f'script mode imported the web layer ({", ".join(modules)})')
+        if median > budget:
+            failures.append(f'{mode} start took {median:.0f} ms (budget {budget:.0f} ms)')
+
+    if failures:
+        for failure in failures:
+            print(f'✗ {failure}')
+        sys.exit(1)
+    print('✓ Cold start within budget')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Synthetic order history generator
+Fills a SQLite file with vendors, students, menus and months of orders
+using bulk Core inserts. Orders follow campus demand: breakfast, lunch
+and evening-snack peaks around a 13:00 lunch rush, quiet weekends, a few
+busy vendors and a long tail, and popular items within each menu. Today
+gets a partial day of live orders so the "today" dashboards have data.
+
+Usage: python benchmarks/generate_history.py history.db --orders 100000 --vendors 20 --students 2000 --months 6
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK_SIZE = 20000
+ITEMS_PER_VENDOR = 25
+CATEGORIES = ['Chai & Coffee', 'Snacks & Quick Bites', 'Main Course', 'Drinks & Beverages']
+
+# (weight, mean minute of day, spread in minutes); the last entry is background traffic
+DEMAND_PEAKS = [
+    (0.20, 8 * 60 + 45, 30),
+    (0.50, 13 * 60, 45),
+    (0.20, 16 * 60 + 30, 40),
+    (0.10, None, None)
+]
+OPEN_MINUTE, CLOSE_MINUTE = 8 * 60, 19 * 60 + 50
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.9, 0.4, 0.1]
+LIVE_STATUSES = ['placed', 'confirmed', 'preparing', 'ready', 'picked_up']
+
+def _zipf_weights(n, s=0.8):
+    return [1 / (rank + 1) ** s for rank in range(n)]
+
+def _pickup_minute(rng):
+    """Minute of day for a pickup, drawn from the campus demand peaks"""
+    roll = rng.random()
+    for weight, mean, spread in DEMAND_PEAKS:
+        roll -= weight
+        if roll <= 0 and mean is not None:
+            minute = int(rng.gauss(mean, spread))
+            break
+    else:
+        minute = rng.randint(OPEN_MINUTE, CLOSE_MINUTE)
+    minute = min(max(minute, OPEN_MINUTE), CLOSE_MINUTE)
+    return minute - minute % 10
+
+def _create_people(vendors, students):
+    """Bulk insert categories, vendors and students; returns (vendor_ids, student_ids)"""
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import db, User, Category
+
+    # One shared hash; generating thousands would dominate the run
+    password_hash = generate_password_hash('password123', 'pbkdf2:sha256:1000')
+    db.session.execute(insert(Category), [{'name': name, 'description': name} for name in CATEGORIES])
+    db.session.execute(insert(User), [{
+        'email': f'vendor{i}@somaiya.edu', 'full_name': f'Vendor {i}', 'phone': f'98{i:08d}',
+        'role': 'vendor', 'password_hash': password_hash
+    } for i in range(1, vendors + 1)] + [{
+        'email': f'student{i}@somaiya.edu', 'full_name': f'Student {i}', 'phone': f'97{i:08d}',
+        'role': 'student', 'password_hash': password_hash
+    } for i in range(1, students + 1)])
+
+    vendor_ids = [row[0] for row in db.session.query(User.id).filter_by(role='vendor').order_by(User.id)]
+    student_ids = [row[0] for row in db.session.query(User.id).filter_by(role='student')]
+    return vendor_ids, student_ids
+
+def _create_menus(rng, vendor_ids):
+    """Bulk insert menus; returns {vendor_id: [(item_id, price), ...]} in popularity order"""
+    from sqlalchemy import insert
+    from models import db, Category, MenuItem
+
+    category_ids = [row[0] for row in db.session.query(Category.id)]
+    rows = []
+    for vendor_id in vendor_ids:
+        for i in range(ITEMS_PER_VENDOR):
+            tracked = rng.random() < 0.3
+            rows.append({
+                'name': f'Item {i + 1}',
+                'description': 'Generated menu item',
+                'price': float(rng.choice(range(10, 160, 5))),
+                'category_id': rng.choice(category_ids),
+                'vendor_id': vendor_id,
+                'is_available': True,
+                'stock_quantity': rng.randint(0, 40) if tracked else None
+            })
+    db.session.execute(insert(MenuItem), rows)
+
+    menus = {vendor_id: [] for vendor_id in vendor_ids}
+    for item_id, vendor_id, price in db.session.query(MenuItem.id, MenuItem.vendor_id, MenuItem.price).order_by(MenuItem.id):
+        menus[vendor_id].append((item_id, price))
+    return menus
+
+def _order_times(rng, count, months, now):
+    """Yield (created_at, pickup_time, pickup_at) for count orders over the history window"""
+    days = max(1, int(months * 30))
+    day_weights = [WEEKDAY_WEIGHTS[(now - timedelta(days=offset)).weekday()] for offset in range(days)]
+    cumulative = []
+    total = 0
+    for weight in day_weights:
+        total += weight
+        cumulative.append(total)
+
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for offset in rng.choices(range(days), cum_weights=cumulative, k=count):
+        minute = _pickup_minute(rng)
+        pickup_at = midnight - timedelta(days=offset) + timedelta(minutes=minute)
+        created_at = pickup_at - timedelta(minutes=rng.randint(10, 120), seconds=rng.randint(0, 59))
+        if created_at > now:
+            # Later today has not happened yet; move it back a week
+            pickup_at -= timedelta(days=7)
+            created_at -= timedelta(days=7)
+        yield created_at, f'{minute // 60:02d}:{minute % 60:02d}', pickup_at
+
+def generate_history(orders, vendors=20, students=2000, months=6, seed=42, log=print):
+    """Generate the full dataset in the current app context's database"""
+    from sqlalchemy import insert
+    from models import db, Order, OrderItem
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    db.create_all()
+    vendor_ids, student_ids = _create_people(vendors, students)
+    menus = _create_menus(rng, vendor_ids)
+    vendor_cumulative = []
+    total = 0
+    for weight in _zipf_weights(len(vendor_ids)):
+        total += weight
+        vendor_cumulative.append(total)
+    item_weights = _zipf_weights(ITEMS_PER_VENDOR, 1.0)
+
+    order_rows, item_rows = [], []
+    times = _order_times(rng, orders, months, now)
+    for order_id in range(1, orders + 1):
+        created_at, pickup_time, pickup_at = next(times)
+        vendor_id = rng.choices(vendor_ids, cum_weights=vendor_cumulative)[0]
+        menu = menus[vendor_id]
+
+        amount = 0.0
+        for item_id, price in set(rng.choices(menu, weights=item_weights, k=rng.choice((1, 1, 2, 2, 3)))):
+            quantity = rng.choice((1, 1, 1, 2, 3))
+            amount += price * quantity
+            item_rows.append({'order_id': order_id, 'menu_item_id': item_id, 'quantity': quantity,
+                              'price': price, 'created_at': created_at})
+
+        if created_at.date() == now.date():
+            status = rng.choice(LIVE_STATUSES)
+        else:
+            status = 'cancelled' if rng.random() < 0.06 else 'ready' if rng.random() < 0.04 else 'picked_up'
+        online = rng.random() < 0.6
+        order_rows.append({
+            'id': order_id,
+            'order_number': f'STQ{order_id:09d}',
+            'student_id': rng.choice(student_ids),
+            'vendor_id': vendor_id,
+            'total_amount': round(amount, 2),
+            'payment_method': 'online' if online else 'cod',
+            'payment_status': 'paid' if online else 'cod',
+            'order_status': status,
+            'pickup_time': pickup_time,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'picked_up_at': pickup_at if status == 'picked_up' else None
+        })
+
+        if len(order_rows) >= CHUNK_SIZE or order_id == orders:
+            db.session.execute(insert(Order.__table__), order_rows)
+            db.session.execute(insert(OrderItem.__table__), item_rows)
+            db.session.commit()
+            order_rows, item_rows = [], []
+            log(f'  {order_id:,}/{orders:,} orders')
+
+    return vendor_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', help='SQLite file to create (must not exist)')
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--vendors', type=int, default=20)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--months', type=float, default=6)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.path)
+    if os.path.exists(path):
+        raise SystemExit(f'✗ {path} already exists')
+
+    import config
+    config.Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    from app import create_app
+    from models import db
+
+    app = create_app(web=False)
+
+    started = time.perf_counter()
+    with app.app_context():
+        # Throwaway file: skip durability while loading
+        db.session.execute(db.text('PRAGMA journal_mode=OFF'))
+        db.session.execute(db.text('PRAGMA synchronous=OFF'))
+        print(f'Generating {args.orders:,} orders for {args.vendors} vendors over {args.months:g} months...')
+        generate_history(args.orders, args.vendors, args.students, args.months, args.seed)
+    print(f'✓ Wrote {path} in {time.perf_counter() - started:.1f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Hub latency benchmark for database offloading
+Fills a throwaway SQLite database with order history, then runs the heavy
+analytics helpers from several greenlets while a probe greenlet measures
+how late the hub wakes it. Every SocketIO frame is handled by a greenlet
+on the same hub, so probe lateness is the latency WebSocket clients see.
+Compares DB_OFFLOAD_ENABLED off and on.
+
+Usage: python benchmarks/hub_latency.py --orders 50000 --workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import eventlet
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROBE_INTERVAL = 0.01
+
+def build_database(orders):
+    """Create vendor, student, menu and order history with bulk inserts"""
+    from sqlalchemy import insert
+    from models import db, User, Category, MenuItem, Order, OrderItem
+
+    db.create_all()
+    category = Category(name='Snacks & Quick Bites')
+    vendor = User(email='vendor@somaiya.edu', full_name='Bench Vendor', phone='9876543210', role='vendor', password_hash='x')
+    student = User(email='student@somaiya.edu', full_name='Bench Student', phone='9876543211', password_hash='x')
+    db.session.add_all([category, vendor, student])
+    db.session.flush()
+    items = [MenuItem(name=f'Item {i}', price=20 + i, category_id=category.id, vendor_id=vendor.id) for i in range(30)]
+    db.session.add_all(items)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    db.session.execute(insert(Order), [{
+        'order_number': f'BENCH{i:08d}',
+        'student_id': student.id,
+        'vendor_id': vendor.id,
+        'total_amount': 50.0,
+        'payment_method': 'cod',
+        'payment_status': 'cod',
+        'order_status': 'picked_up',
+        'pickup_time': f'{random.randint(8, 18):02d}:{random.choice(range(0, 60, 10)):02d}',
+        'created_at': now - timedelta(minutes=random.randint(0, 60 * 24 * 14))
+    } for i in range(orders)])
+    order_ids = [row[0] for row in db.session.query(Order.id)]
+    db.session.execute(insert(OrderItem), [{
+        'order_id': order_id,
+        'menu_item_id': random.choice(items).id,
+        'quantity': random.randint(1, 3),
+        'price': 25.0
+    } for order_id in order_ids])
+    db.session.commit()
+    return vendor.id
+
+def run_round(app, vendor_id, workers, iterations):
+    """Run analytics from several greenlets and probe hub lateness"""
+    import analytics
+    from models import db
+
+    lateness = []
+    done = []
+
+    def probe():
+        while not done:
+            start = time.perf_counter()
+            eventlet.sleep(PROBE_INTERVAL)
+            lateness.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+    def run_analytics():
+        with app.app_context():
+            for _ in range(iterations):
+                analytics.get_popular_items(vendor_id)
+                analytics.get_peak_hours_weekly(vendor_id)
+                analytics.get_low_stock_items(vendor_id)
+            db.session.remove()
+
+    prober = eventlet.spawn(probe)
+    started = time.perf_counter()
+    pool = eventlet.GreenPool(workers)
+    for _ in range(workers):
+        pool.spawn(run_analytics)
+    pool.waitall()
+    elapsed = time.perf_counter() - started
+    done.append(True)
+    prober.wait()
+
+    lateness.sort()
+    pick = lambda q: lateness[min(len(lateness) - 1, int(q * len(lateness)))] * 1000
+    return {'elapsed_s': elapsed, 'p50_ms': pick(0.50), 'p99_ms': pick(0.99), 'max_ms': lateness[-1] * 1000}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--iterations', type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    import config
+    config.Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    from app import create_app
+    app = create_app()
+
+    with app.app_context():
+        print(f'Generating {args.orders} orders...')
+        vendor_id = build_database(args.orders)
+
+    print(f'{"offload":<10}{"elapsed s":>12}{"p50 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for enabled in (False, True):
+        app.config['DB_OFFLOAD_ENABLED'] = enabled
+        result = run_round(app, vendor_id, args.workers, args.iterations)
+        print(f'{"on" if enabled else "off":<10}{result["elapsed_s"]:>12.2f}{result["p50_ms"]:>10.1f}'
+              f'{result["p99_ms"]:>10.1f}{result["max_ms"]:>10.1f}')
+
+if __name__ == '__main__':
+    main()
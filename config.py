@@ -14,13 +14,99 @@ class Config:
     # Razorpay Configuration
     RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID') or 'rzp_test_your_key_id'
     RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET') or 'your_key_secret'
+    PAYMENT_GATEWAY = os.environ.get('PAYMENT_GATEWAY', 'razorpay')  # 'stub' for local development and tests
+    PAYMENT_POOL_SIZE = 10  # Pooled HTTPS connections to the gateway
+    PAYMENT_PENDING_TIMEOUT_MINUTES = int(os.environ.get('PAYMENT_PENDING_TIMEOUT_MINUTES', 15))  # Then cancelled
+    PAYMENT_RECONCILE_GRACE_SECONDS = 120  # Leave fresh orders to the checkout callback
+    PAYMENT_RECONCILE_BATCH = 500  # Pending orders settled per sweep (python payments.py)
     
     # Session Configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 300))  # Seconds to cache user snapshots
+    
+    # Password Hashing Configuration
+    # Full werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 4))  # Hashes running at once
+    PASSWORD_HASH_OFFLOAD = True  # Hash in eventlet's thread pool instead of on the hub
+    
+    # Template Fragment Cache Configuration
+    FRAGMENT_CACHE_MAX_ENTRIES = 512
+    FRAGMENT_CACHE_TTL = 300  # Seconds
+    
+    # Realtime Configuration
+    REPLAY_BUFFER_SIZE = 50  # Recent events kept per room for reconnecting clients
+    
+    # Response Compression Configuration
+    COMPRESS_MIN_SIZE = 1024  # Bytes; smaller HTML/JSON responses are sent as-is
+    COMPRESS_LEVEL = 6
+    
+    # Database Offload Configuration
+    DB_OFFLOAD_ENABLED = True  # Run @offload_db helpers in eventlet's thread pool
+    THREADPOOL_SIZE = int(os.environ.get('THREADPOOL_SIZE', 20))  # Native threads shared by DB work and hashing
+    
+    # Eventlet Hub Watchdog (diagnostics, off by default)
+    HUB_WATCHDOG_ENABLED = os.environ.get('HUB_WATCHDOG') == '1'
+    HUB_WATCHDOG_THRESHOLD = float(os.environ.get('HUB_WATCHDOG_THRESHOLD', 0.3))  # Seconds
     
     # Upload Configuration
     UPLOAD_FOLDER = 'static/qrcodes'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
     # Email Domain Restriction
-    ALLOWED_EMAIL_DOMAIN = '@somaiya.edu'
\ No newline at end of file
+    ALLOWED_EMAIL_DOMAIN = '@somaiya.edu'
+    
+    # Demand Forecasting Configuration
+    FORECAST_HISTORY_WEEKS = int(os.environ.get('FORECAST_HISTORY_WEEKS', 8))
+    FORECAST_SMOOTHING = float(os.environ.get('FORECAST_SMOOTHING', 0.5))  # Weight of the most recent week
+    FORECAST_HEADROOM = float(os.environ.get('FORECAST_HEADROOM', 1.0))  # Std deviations of safety margin
+    FORECAST_MIN_CAPACITY = 5
+    FORECAST_MAX_CAPACITY = 50
+    
+    # Order Archival Configuration
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+    
+    # Order Lifecycle Events (prep and pickup latency on the analytics page)
+    ORDER_LATENCY_WINDOW_DAYS = 7  # Percentiles cover this many days
+    ORDER_EVENT_RETENTION_DAYS = 90  # Purged by: python archive.py
+    
+    # Wait Time Estimates (EWMA of each kitchen's completions per minute)
+    WAIT_EWMA_MINUTES = 15  # Time constant; completions older than this count for less than 37%
+    WAIT_MIN_RATE = 0.5  # Orders per minute assumed at least, for quiet or new kitchens
+    
+    # Slot Recommendations (steer checkouts toward underloaded slots)
+    SLOT_COUNTS_REFRESH_SECONDS = 30  # In-memory booking counts are reloaded this often
+    SLOT_NEAR_FULL_RATIO = 0.8  # Checkout offers alternatives once a slot is this full
+    SLOT_RECOMMEND_ALTERNATIVES = 3
+    SLOT_RECOMMEND_WAIT_WEIGHT = 0.5  # Score added per hour until the slot
+    
+    # Trending Items (Space-Saving sketches per vendor and campus-wide, fed from checkout)
+    TRENDING_CAPACITY = 32  # Counters per sketch; items ordered > 1/32 of the time are never missed
+    
+    # Order Expiry Configuration (uncollected orders expire and free their slot)
+    ORDER_EXPIRY_GRACE_MINUTES = int(os.environ.get('ORDER_EXPIRY_GRACE_MINUTES', 30))  # After the pickup slot
+    ORDER_EXPIRY_TICK_SECONDS = 5
+    
+    # Admission Control for write routes (change live: flask admission set)
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', 8))  # Write requests in flight
+    ADMISSION_USER_RATE = 3.0  # Requests per second per student
+    ADMISSION_USER_BURST = 10
+    ADMISSION_VENDOR_RATE = 15.0  # Requests per second per vendor
+    ADMISSION_VENDOR_BURST = 40
+    ADMISSION_PASS_SECONDS = 5  # A student called from the line must retry within this
+    ADMISSION_LINE_SECONDS = 15  # Students who stop retrying for this long leave the line
+    ADMISSION_REFRESH_SECONDS = 5  # How often overrides are reloaded
+    
+    # Background Job Configuration (workers: flask --app "app:create_app(web=False)" jobs worker)
+    JOB_LEASE_SECONDS = 300  # A job whose worker died is retried after this
+    JOB_MAX_ATTEMPTS = 5
+    JOB_RETRY_BASE_SECONDS = 10  # Doubles after every failed attempt
+    JOB_RETRY_MAX_SECONDS = 3600
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 0.5))  # Seconds between polls when idle
+    JOB_RETENTION_DAYS = 7  # Finished jobs kept for inspection
+    # Set when `jobs worker` processes serve the 'default' queue (QR images, reconciliation);
+    # otherwise the web process drains it too, running those jobs in its thread pool
+    JOBS_EXTERNAL_WORKERS = os.environ.get('JOBS_EXTERNAL_WORKERS', '').lower() in ('1', 'true', 'yes')
+    JOBS_WEB_QUEUES = [q for q in os.environ.get(
+        'JOBS_WEB_QUEUES', 'web' if JOBS_EXTERNAL_WORKERS else 'web,default').split(',') if q]
\ No newline at end of file
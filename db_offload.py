@@ -0,0 +1,48 @@
+"""
+Database calls off the eventlet hub
+SQLAlchemy over the sqlite3 C module is not green, so a slow query blocks
+the OS thread that also serves every SocketIO connection. Functions
+wrapped with @offload_db run in eventlet's native thread pool inside a
+copy of the caller's context, so they see the same app and request
+context and therefore the same request-scoped session while the calling
+greenlet waits. Other greenlets keep running in the meantime.
+
+Request handlers use the layer three ways:
+
+- @offload_db on a read-only view runs the whole view, queries and
+  template, in the pool (vendor dashboard, orders, menu, slots)
+- @offload_db on a helper runs just that helper (analytics)
+- commit_session() and run_in_db_thread() move the writes of handlers
+  that also emit SocketIO events (checkout, order status, pickup);
+  emitting must stay on the hub
+"""
+
+import contextvars
+from functools import wraps
+from flask import current_app, has_app_context
+
+def init_db_offload(app):
+    """Size eventlet's thread pool; must run before the pool is first used"""
+    from eventlet import tpool
+    tpool.set_num_threads(app.config['THREADPOOL_SIZE'])
+
+def run_in_db_thread(func, *args, **kwargs):
+    """Run session work in a pool thread, blocking only the calling greenlet"""
+    if not (has_app_context() and current_app.config.get('DB_OFFLOAD_ENABLED', True)):
+        return func(*args, **kwargs)
+
+    from eventlet import tpool
+    context = contextvars.copy_context()
+    return tpool.execute(context.run, func, *args, **kwargs)
+
+def offload_db(f):
+    """Decorator running a database-heavy helper via run_in_db_thread"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        return run_in_db_thread(f, *args, **kwargs)
+    return decorated_function
+
+def commit_session():
+    """Commit the request's session in the pool; waiting for SQLite's write lock and fsync happen here"""
+    from models import db
+    run_in_db_thread(db.session.commit)
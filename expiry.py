@@ -0,0 +1,195 @@
+"""
+Expiry of uncollected orders
+An open order is due at its pickup slot plus ORDER_EXPIRY_GRACE_MINUTES.
+Deadlines are kept in a hierarchical timer wheel in the web process, so
+tracking, forgetting and expiring an order are O(1) and nothing polls the
+order table: checkout tracks new orders, open orders are loaded once when
+the web process starts, and a background greenlet turns the wheel every
+ORDER_EXPIRY_TICK_SECONDS. Due orders move to 'expired' in batched
+UPDATEs, which frees their pickup slot, and each affected vendor gets one
+orders_expired event per tick.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from models import db, Order
+from realtime import event_stream
+from order_events import record_statuses
+from utils import slot_deadline
+
+OPEN_ORDER_STATUSES = ('placed', 'confirmed', 'preparing', 'ready')
+EXPIRE_BATCH_SIZE = 500
+
+class TimerWheel:
+    """Hierarchical timing wheel of keys that fall due on a tick
+    Level 0 has one slot per tick; a slot on each higher level spans a full
+    turn of the level below, and its keys cascade down when time reaches
+    it. schedule() and cancel() are O(1); advance() costs O(1) per tick
+    plus the keys that fall due or cascade.
+    """
+
+    def __init__(self, tick_seconds, levels=4, bits=6, start=None):
+        self.tick_seconds = tick_seconds
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.span = 1 << (bits * levels)  # Ticks covered by the whole wheel
+        self.wheels = [[set() for _ in range(1 << bits)] for _ in range(levels)]
+        self.current = self._tick(time.time() if start is None else start)
+        self.entries = {}  # key -> (due tick, level, slot); level None means overdue
+        self.overdue = set()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _tick(self, timestamp):
+        return int(timestamp // self.tick_seconds)
+
+    def _place(self, key, due):
+        delta = due - self.current
+        if delta <= 0:
+            self.overdue.add(key)
+            self.entries[key] = (due, None, None)
+            return
+        # Beyond the top level's reach: park in its furthest slot and re-place on cascade
+        placed = min(due, self.current + self.span - 1)
+        level = 0
+        while delta >= 1 << (self.bits * (level + 1)) and level < len(self.wheels) - 1:
+            level += 1
+        slot = (placed >> (self.bits * level)) & self.mask
+        self.wheels[level][slot].add(key)
+        self.entries[key] = (due, level, slot)
+
+    def schedule(self, key, timestamp):
+        """Fire key at timestamp (seconds since the epoch), replacing any earlier timer"""
+        self.cancel(key)
+        self._place(key, self._tick(timestamp))
+
+    def cancel(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        _, level, slot = entry
+        if level is None:
+            self.overdue.discard(key)
+        else:
+            self.wheels[level][slot].discard(key)
+
+    def _cascade(self, level):
+        """Move the slot of this level that time just reached down the wheel"""
+        if level >= len(self.wheels) or self.current & ((1 << (self.bits * level)) - 1):
+            return
+        self._cascade(level + 1)
+        slot = (self.current >> (self.bits * level)) & self.mask
+        keys, self.wheels[level][slot] = self.wheels[level][slot], set()
+        for key in keys:
+            self._place(key, self.entries[key][0])
+
+    def advance(self, timestamp):
+        """Turn the wheel up to timestamp; returns the keys that fell due"""
+        target = self._tick(timestamp)
+        due = []
+        while self.current < target:
+            self.current += 1
+            self._cascade(1)
+            slot = self.current & self.mask
+            due.extend(self.wheels[0][slot])
+            self.wheels[0][slot] = set()
+        # Scheduled in the past, or cascaded onto the tick just reached
+        due.extend(self.overdue)
+        self.overdue = set()
+        for key in due:
+            del self.entries[key]
+        return due
+
+def _timestamp(utc_datetime):
+    return utc_datetime.replace(tzinfo=timezone.utc).timestamp()
+
+class OrderExpiry:
+    def __init__(self):
+        self.wheel = None
+        self.grace = timedelta()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, socketio):
+        self.grace = timedelta(minutes=app.config['ORDER_EXPIRY_GRACE_MINUTES'])
+        self.wheel = TimerWheel(app.config['ORDER_EXPIRY_TICK_SECONDS'])
+        socketio.start_background_task(self._run, app, socketio)
+
+    def track(self, order_id, pickup_deadline):
+        """Expire an order once its pickup deadline and the grace period have passed"""
+        if self.wheel is None:
+            return  # Scripts and workers do not expire orders
+        with self._lock:
+            self.wheel.schedule(order_id, _timestamp(pickup_deadline + self.grace))
+
+    def forget(self, order_id):
+        """Stop tracking an order that was collected or cancelled"""
+        if self.wheel is None:
+            return
+        with self._lock:
+            self.wheel.cancel(order_id)
+
+    def load_open_orders(self):
+        """Track every open order; runs once when the web process starts"""
+        rows = db.session.query(Order.id, Order.pickup_deadline, Order.pickup_time, Order.created_at).filter(
+            Order.order_status.in_(OPEN_ORDER_STATUSES)).all()
+        for row in rows:
+            # Orders placed before pickup_deadline existed: resolve the slot from the order time
+            deadline = row.pickup_deadline or slot_deadline(
+                row.pickup_time, row.created_at.replace(tzinfo=timezone.utc).astimezone())
+            self.track(row.id, deadline)
+        return len(rows)
+
+    def expire_due(self, now=None):
+        """Expire the orders that fell due; returns how many were expired"""
+        with self._lock:
+            due = self.wheel.advance(time.time() if now is None else now)
+
+        by_vendor = defaultdict(list)
+        for start in range(0, len(due), EXPIRE_BATCH_SIZE):
+            batch = due[start:start + EXPIRE_BATCH_SIZE]
+            try:
+                rows = db.session.execute(
+                    update(Order).where(Order.id.in_(batch), Order.order_status.in_(OPEN_ORDER_STATUSES))
+                    .values(order_status='expired').returning(Order.id, Order.vendor_id)
+                ).all()
+                record_statuses(rows, 'expired')
+                db.session.commit()
+            except OperationalError:
+                # Database busy: retry the rest on the next tick
+                db.session.rollback()
+                with self._lock:
+                    for order_id in due[start:]:
+                        self.wheel.schedule(order_id, 0)
+                break
+            for row in rows:
+                by_vendor[row.vendor_id].append(row.id)
+
+        for vendor_id, order_ids in by_vendor.items():
+            event_stream.emit('orders_expired', {
+                'order_ids': order_ids,
+                'message': f'{len(order_ids)} uncollected order(s) expired'
+            }, f'vendor_{vendor_id}')
+        return sum(len(order_ids) for order_ids in by_vendor.values())
+
+    def _run(self, app, socketio):
+        loaded = False
+        while True:
+            with app.app_context():
+                try:
+                    if not loaded:
+                        app.logger.info(f'Tracking {self.load_open_orders()} open order(s) for expiry')
+                        loaded = True
+                    self.expire_due()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Order expiry error')
+                finally:
+                    db.session.remove()
+            socketio.sleep(self.wheel.tick_seconds)
+
+order_expiry = OrderExpiry()
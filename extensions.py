@@ -0,0 +1,10 @@
+"""
+Extension instances shared by the blueprints, bound in create_app()
+"""
+
+from flask_login import LoginManager
+from flask_socketio import SocketIO
+
+socketio = SocketIO()
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
@@ -0,0 +1,160 @@
+"""
+Demand forecasting for vendor pickup slots
+Builds a vendor x weekday x slot demand cube from order history and
+computes smoothed forecasts and recommended capacities for every vendor
+in one vectorized pass. Run this script periodically (e.g. nightly).
+"""
+
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import func, insert
+from models import db, SlotForecast, RELEASED_ORDER_STATUSES
+from archive import order_history
+from utils import SLOT_MINUTES
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def slot_index(slot_time):
+    """Convert 'HH:MM' into a slot index, or -1 if it is not a valid slot"""
+    try:
+        hour, minute = (int(part) for part in slot_time.split(':'))
+    except (AttributeError, ValueError):
+        return -1
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return -1
+    return hour * (60 // SLOT_MINUTES) + minute // SLOT_MINUTES
+
+def slot_label(index):
+    """Convert a slot index back into 'HH:MM'"""
+    minutes = int(index) * SLOT_MINUTES
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+def _utc_midnight(day):
+    """Naive UTC datetime of the local midnight starting day"""
+    return datetime.combine(day, datetime.min.time()).astimezone().astimezone(timezone.utc).replace(tzinfo=None)
+
+def load_demand_history(weeks, today=None):
+    """Load order counts as a (vendors, weeks, weekdays, slots) array
+    Days are local. Week 0 is the seven days up to yesterday; today is left
+    out because it is not over yet. Returns (vendor_ids, cube).
+    """
+    today = today or datetime.now().date()
+    yesterday = today - timedelta(days=1)
+    since = today - timedelta(weeks=weeks)
+
+    history = order_history('id', 'vendor_id', 'created_at', 'pickup_time', 'order_status', 'payment_status')
+    rows = db.session.query(
+        history.c.vendor_id,
+        func.date(history.c.created_at, 'localtime').label('day'),  # created_at is UTC
+        history.c.pickup_time,
+        func.count(history.c.id).label('count')
+    ).filter(
+        history.c.created_at >= _utc_midnight(since),
+        history.c.created_at < _utc_midnight(today),
+        history.c.order_status.notin_(RELEASED_ORDER_STATUSES),  # Cancelled or never collected
+        history.c.payment_status != 'failed'
+    ).group_by(history.c.vendor_id, 'day', history.c.pickup_time).all()
+
+    if not rows:
+        return np.array([], dtype=np.int64), np.zeros((0, weeks, 7, SLOTS_PER_DAY))
+
+    vendors = np.fromiter((r.vendor_id for r in rows), dtype=np.int64, count=len(rows))
+    days = np.array([r.day for r in rows], dtype='datetime64[D]')
+    slots = np.fromiter((slot_index(r.pickup_time) for r in rows), dtype=np.int64, count=len(rows))
+    counts = np.fromiter((r.count for r in rows), dtype=np.float64, count=len(rows))
+
+    vendor_ids, vendor_idx = np.unique(vendors, return_inverse=True)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    week = (np.datetime64(yesterday, 'D') - days).astype(np.int64) // 7
+    valid = (slots >= 0) & (week >= 0) & (week < weeks)
+
+    cube = np.zeros((len(vendor_ids), weeks, 7, SLOTS_PER_DAY))
+    np.add.at(cube, (vendor_idx[valid], week[valid], weekday[valid], slots[valid]), counts[valid])
+    return vendor_ids, cube
+
+def forecast_demand(cube, smoothing=0.5, headroom=1.0, min_capacity=5, max_capacity=50):
+    """Forecast demand and recommend capacities from a demand cube
+    Uses exponentially weighted weeks (ignoring weeks before a vendor's
+    first order) and a small kernel across neighbouring slots.
+    Returns (forecast, recommended), both shaped (vendors, weekdays, slots).
+    """
+    vendors, weeks = cube.shape[:2]
+    if vendors == 0:
+        empty = np.zeros((0, 7, SLOTS_PER_DAY))
+        return empty, empty.astype(np.int64)
+
+    # Only weight weeks since each vendor's oldest observed week
+    observed = cube.sum(axis=(2, 3)) > 0
+    oldest = weeks - 1 - np.argmax(observed[:, ::-1], axis=1)
+    active = np.arange(weeks)[None, :] <= oldest[:, None]
+
+    weights = smoothing * (1 - smoothing) ** np.arange(weeks)
+    weights = weights[None, :] * active
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    mean = np.einsum('vw,vwds->vds', weights, cube)
+    variance = np.einsum('vw,vwds->vds', weights, (cube - mean[:, None]) ** 2)
+
+    padded = np.pad(mean, ((0, 0), (0, 0), (1, 1)), mode='edge')
+    forecast = 0.25 * padded[..., :-2] + 0.5 * padded[..., 1:-1] + 0.25 * padded[..., 2:]
+
+    recommended = np.ceil(forecast + headroom * np.sqrt(variance))
+    recommended = np.clip(recommended, min_capacity, max_capacity).astype(np.int64)
+    return forecast, recommended
+
+def refresh_forecasts(today=None):
+    """Recompute and store slot forecasts for all vendors
+    Returns the number of forecast rows stored.
+    """
+    config = current_app.config
+    vendor_ids, cube = load_demand_history(config['FORECAST_HISTORY_WEEKS'], today)
+    forecast, recommended = forecast_demand(
+        cube,
+        smoothing=config['FORECAST_SMOOTHING'],
+        headroom=config['FORECAST_HEADROOM'],
+        min_capacity=config['FORECAST_MIN_CAPACITY'],
+        max_capacity=config['FORECAST_MAX_CAPACITY']
+    )
+
+    # Store only cells with expected demand
+    v_idx, d_idx, s_idx = np.nonzero(forecast > 0.01)
+    now = datetime.utcnow()
+    rows = [{
+        'vendor_id': int(vendor_ids[v]),
+        'weekday': int(d),
+        'slot_time': slot_label(s),
+        'forecast': round(float(forecast[v, d, s]), 2),
+        'recommended_capacity': int(recommended[v, d, s]),
+        'updated_at': now
+    } for v, d, s in zip(v_idx, d_idx, s_idx)]
+
+    db.session.query(SlotForecast).delete()
+    if rows:
+        db.session.execute(insert(SlotForecast), rows)
+    db.session.commit()
+    return len(rows)
+
+def get_capacity_suggestions(vendor_id, time_slots, weekday=None):
+    """Get stored forecasts for a vendor's slots
+    Returns: {slot_time: {'forecast': float, 'recommended': int}}
+    """
+    if weekday is None:
+        weekday = datetime.now().weekday()
+
+    forecasts = SlotForecast.query.filter(
+        SlotForecast.vendor_id == vendor_id,
+        SlotForecast.weekday == weekday,
+        SlotForecast.slot_time.in_(time_slots)
+    ).all()
+
+    return {f.slot_time: {'forecast': f.forecast, 'recommended': f.recommended_capacity}
+            for f in forecasts}
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app(web=False)
+    with app.app_context():
+        db.create_all()
+        count = refresh_forecasts()
+        print(f'✓ Stored {count} slot forecasts')
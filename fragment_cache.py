@@ -0,0 +1,122 @@
+"""
+Jinja fragment caching
+Adds a {% cache key, ttl %} ... {% endcache %} block backed by a bounded
+in-memory LRU. Keys embed version counters (cache_version('menu')) that
+are bumped whenever a change to menu items or categories commits, so a fragment is
+rendered once per menu version rather than once per request. Versions
+are per process; the TTL bounds staleness across workers.
+
+    {% cache 'category_items', category.id, cache_version('menu'), 300 %}
+        ...
+    {% endcache %}
+
+All arguments except the last form the key; the last is the TTL in
+seconds (None uses FRAGMENT_CACHE_TTL).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from models import Category, MenuItem
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments with per-entry TTL"""
+
+    def __init__(self, max_entries=512, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+fragment_cache = FragmentCache()
+
+# Version counters embedded in cache keys
+_versions = {}
+_versions_lock = threading.Lock()
+
+def cache_version(namespace):
+    return _versions.get(namespace, 0)
+
+def bump_version(namespace):
+    """Invalidate every fragment keyed on this namespace's version"""
+    with _versions_lock:
+        _versions[namespace] = _versions.get(namespace, 0) + 1
+
+@event.listens_for(MenuItem, 'after_insert')
+@event.listens_for(MenuItem, 'after_update')
+@event.listens_for(MenuItem, 'after_delete')
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+@event.listens_for(Category, 'after_delete')
+def _mark_menu_changed(mapper, connection, target):
+    # Flushed is not committed: bump once the change is visible to other requests
+    session = object_session(target)
+    if session is not None:
+        session.info['menu_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _bump_menu_version(session):
+    if session.info.pop('menu_changed', False):
+        bump_version('menu')
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_menu_change(session):
+    session.info.pop('menu_changed', None)
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        ttl = args.pop() if len(args) > 1 else nodes.Const(None)
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.List(args), ttl]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key_parts, ttl, caller):
+        key = '|'.join(str(part) for part in key_parts)
+        value = fragment_cache.get(key)
+        if value is None:
+            value = Markup(caller())
+            fragment_cache.set(key, value, ttl)
+        return value
+
+def init_fragment_cache(app):
+    fragment_cache.max_entries = app.config['FRAGMENT_CACHE_MAX_ENTRIES']
+    fragment_cache.default_ttl = app.config['FRAGMENT_CACHE_TTL']
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals['cache_version'] = cache_version
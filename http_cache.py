@@ -0,0 +1,101 @@
+"""
+Conditional GET and response compression
+@conditional(validator) computes a cheap version of a page before the
+view runs; when the browser already holds that version it gets a 304
+without the view doing any work. Pages that do render get a weak ETag,
+Last-Modified and "private, no-cache" so they are always revalidated.
+json_response() gives computed JSON an ETag, so an unchanged result goes
+back as a 304. init_compression() gzips HTML and JSON responses above a
+size threshold.
+"""
+
+import gzip
+import hashlib
+import time
+from functools import wraps
+from flask import current_app, request, session, make_response, jsonify
+from flask_login import current_user
+
+COMPRESSIBLE_TYPES = ('text/html', 'application/json')
+
+# Changes on every restart so template changes never get a stale 304
+_BOOT_TOKEN = str(time.time())
+
+def conditional(validator):
+    """Decorator short-circuiting with 304 Not Modified
+    validator takes the view's arguments and returns (version, last_modified)
+    or None to always render. version is None when last_modified alone
+    identifies the page; otherwise only If-None-Match can give a 304, since
+    If-Modified-Since cannot see the other parts of the version.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pending flash messages must be rendered
+            result = None if session.get('_flashes') else validator(*args, **kwargs)
+            if result is None:
+                return f(*args, **kwargs)
+
+            version, last_modified = result
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+            user_id = current_user.get_id() if current_user.is_authenticated else ''
+            etag = hashlib.sha1(f'{_BOOT_TOKEN}|{user_id}|{request.full_path}|{version}'.encode()).hexdigest()[:20]
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif version is None:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since.replace(tzinfo=None))
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorated_function
+    return decorator
+
+def json_response(data, max_age=0):
+    """JSON with a weak ETag; a matching If-None-Match gets a 304 without the body
+    max_age lets the browser reuse the response for that many seconds
+    without asking; 0 means revalidate every time.
+    """
+    response = jsonify(data)
+    response.add_etag(weak=True)
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def init_compression(app):
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES
+                or not request.accept_encodings['gzip']):
+            return response
+
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
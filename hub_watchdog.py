@@ -0,0 +1,121 @@
+"""
+Eventlet hub blocking-call watchdog
+A heartbeat greenlet ticks on the hub while a real OS thread checks that
+it keeps ticking. When the hub has not been scheduled for longer than the
+threshold, the watchdog captures the stack of the greenlet that is
+running, attributes it to the route that greenlet is serving, logs it and
+keeps it for the diagnostic endpoint. Enable with HUB_WATCHDOG=1.
+"""
+
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+
+import greenlet
+from flask import request
+
+class HubWatchdog:
+    def __init__(self, threshold=0.3, interval=0.05, max_incidents=100):
+        self.threshold = threshold
+        self.interval = interval
+        self.incidents = deque(maxlen=max_incidents)
+        self.counts = Counter()
+        self.logger = None
+        self._routes = {}  # id(greenlet) -> route being served
+        self._running = None  # Greenlet currently scheduled on the hub thread
+        self._last_beat = None
+        self._reported_beat = None
+        self._hub_thread_id = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def init_app(self, app):
+        self.threshold = app.config.get('HUB_WATCHDOG_THRESHOLD', self.threshold)
+        self.logger = app.logger
+
+        @app.before_request
+        def _track_route():
+            self._routes[id(greenlet.getcurrent())] = f'{request.method} {request.endpoint or request.path}'
+
+        @app.teardown_request
+        def _untrack_route(exc=None):
+            self._routes.pop(id(greenlet.getcurrent()), None)
+
+        self.start()
+
+    def start(self):
+        """Start the heartbeat greenlet and the watching OS thread"""
+        if self._started:
+            return
+        import eventlet
+        from eventlet import patcher
+
+        self._started = True
+        self._hub_thread_id = threading.get_ident()
+        previous_trace = greenlet.gettrace()
+
+        def trace(event, args):
+            if event in ('switch', 'throw'):
+                self._running = args[1]
+            if previous_trace:
+                previous_trace(event, args)
+
+        greenlet.settrace(trace)
+        eventlet.spawn(self._heartbeat)
+
+        real_threading = patcher.original('threading')
+        watcher = real_threading.Thread(target=self._watch, name='hub-watchdog', daemon=True)
+        watcher.start()
+
+    def _heartbeat(self):
+        import eventlet
+        while True:
+            self._last_beat = time.monotonic()
+            eventlet.sleep(self.interval)
+
+    def _watch(self):
+        from eventlet import patcher
+        real_sleep = patcher.original('time').sleep
+
+        while True:
+            real_sleep(self.interval)
+            last_beat = self._last_beat
+            if last_beat is None or last_beat == self._reported_beat:
+                continue  # Hub not started yet, or this stall was already reported
+            blocked_for = time.monotonic() - last_beat
+            if blocked_for > self.threshold:
+                self._reported_beat = last_beat
+                self._record(blocked_for)
+
+    def _record(self, blocked_for):
+        frame = sys._current_frames().get(self._hub_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame else ''
+        route = self._routes.get(id(self._running), 'background')
+
+        incident = {
+            'time': datetime.utcnow().isoformat(),
+            'route': route,
+            'blocked_ms': round(blocked_for * 1000, 1),
+            'stack': stack
+        }
+        with self._lock:
+            self.incidents.append(incident)
+            self.counts[route] += 1
+
+        if self.logger:
+            self.logger.warning('Eventlet hub blocked for %.0f ms in %s\n%s',
+                                blocked_for * 1000, route, stack)
+
+    def report(self):
+        """Incident counts per route and the most recent incidents"""
+        with self._lock:
+            return {
+                'threshold_ms': round(self.threshold * 1000, 1),
+                'counts': dict(self.counts.most_common()),
+                'incidents': list(reversed(self.incidents))
+            }
+
+hub_watchdog = HubWatchdog()
@@ -0,0 +1,98 @@
+"""
+Cached user identities for Flask-Login
+Keeps immutable snapshots of the user fields needed on every request
+(id, role, name, email, phone) so authenticated requests and SocketIO
+connects do not query the user table. Routes that modify a user must
+load the ORM object explicitly with User.query.get(current_user.id).
+"""
+
+import threading
+import time
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from models import db, User
+
+class UserIdentity(UserMixin):
+    """Read-only snapshot of a user"""
+    __slots__ = ('id', 'role', 'full_name', 'email', 'phone')
+
+    def __init__(self, user):
+        for field in self.__slots__:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('UserIdentity is read-only; load the User model to make changes')
+
+    def __repr__(self):
+        return f'<UserIdentity {self.id} {self.role}>'
+
+class IdentityCache:
+    """Thread-safe TTL cache of user snapshots"""
+
+    def __init__(self, ttl=300, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def put(self, user):
+        identity = UserIdentity(user)
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._evict_expired()
+            if len(self._entries) >= self.max_size:
+                self._entries.pop(next(iter(self._entries)))  # Drop the oldest entry
+            self._entries[identity.id] = (time.monotonic() + self.ttl, identity)
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for user_id in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[user_id]
+
+identity_cache = IdentityCache()
+
+def load_identity(user_id):
+    """Get a cached identity, loading the user only on a miss"""
+    user_id = int(user_id)
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        identity = identity_cache.put(user)
+    return identity
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _mark_identity_changed(mapper, connection, user):
+    session = object_session(user)
+    if session is not None:
+        session.info.setdefault('changed_users', set()).add(user.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_identity(session):
+    """Drop the snapshot once a change to the user's profile or role commits
+    Invalidating at flush would let a concurrent request cache the old row again.
+    """
+    for user_id in session.info.pop('changed_users', ()):
+        identity_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_identity_changes(session):
+    session.info.pop('changed_users', None)
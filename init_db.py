@@ -3,13 +3,18 @@ Database initialization script for SkipTheQueue
 Run this script to create the database and default categories
 """
 
-from app import app, db
-from models import Category
+from app import create_app
+from models import db, Category, add_missing_columns
+from menu_search import create_search_index
+
+app = create_app(web=False)
 
 def init_database():
     with app.app_context():
         print('Creating database tables...')
         db.create_all()
+        add_missing_columns()
+        create_search_index()
         print('✓ Database tables created')
         
         # Create default categories if they don't exist
@@ -21,9 +26,7 @@ def init_database():
                 Category(name='Drinks & Beverages', description='Cold drinks and juices')
             ]
             
-            for category in categories:
-                db.session.add(category)
-            
+            db.session.add_all(categories)
             db.session.commit()
             print('✓ Default categories created')
             print('─' * 40)
@@ -38,7 +41,13 @@ def init_database():
         print('\nNext steps:')
         print('  1. Run: python add_vendor.py')
         print('  2. Run: python add_sample_menu.py (optional)')
+        print('     or: python menu_import.py menu.csv (bulk import, see menu_import.py)')
         print('  3. Run: python app.py')
+        print('  4. Schedule: python forecasting.py (nightly capacity forecasts)')
+        print('  5. Schedule: python archive.py (archive completed orders)')
+        print('  6. Schedule: python payments.py (settle abandoned online payments)')
+        print('  7. Optional: flask --app "app:create_app(web=False)" jobs worker with JOBS_EXTERNAL_WORKERS=1')
+        print('     (background jobs on all cores instead of in the web process)')
 
 if __name__ == '__main__':
     init_database()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Stock-on-hand counters for menu items
+Vendors set MenuItem.stock_quantity each morning (None means the item is
+not tracked). Checkout takes stock with a single conditional UPDATE per
+item, so concurrent orders can never oversell; an item that reaches zero
+is switched off automatically, and crossing stock_threshold produces a
+low stock alert for the vendor.
+"""
+
+from sqlalchemy import update, case, or_
+from models import db, MenuItem
+
+class OutOfStock(Exception):
+    def __init__(self, item_name):
+        super().__init__(f'{item_name} is sold out')
+        self.item_name = item_name
+
+def reserve_stock(quantities):
+    """Take stock for {item_id: quantity} within the current transaction
+    Raises OutOfStock if an item is unavailable or short; the caller must
+    roll back. Returns (low_stock_alerts, sold_out) where sold_out tells
+    the caller to invalidate the menu after committing.
+    """
+    alerts = []
+    sold_out = False
+
+    for item_id, quantity in quantities.items():
+        remaining = MenuItem.stock_quantity - quantity
+        row = db.session.execute(
+            update(MenuItem).where(
+                MenuItem.id == item_id,
+                MenuItem.is_available == True,
+                or_(MenuItem.stock_quantity.is_(None), MenuItem.stock_quantity >= quantity)
+            ).values(
+                stock_quantity=remaining,
+                is_available=case((remaining <= 0, False), else_=MenuItem.is_available)
+            ).returning(MenuItem.id, MenuItem.name, MenuItem.vendor_id,
+                        MenuItem.stock_quantity, MenuItem.stock_threshold)
+        ).first()
+
+        if row is None:
+            name = db.session.query(MenuItem.name).filter(MenuItem.id == item_id).scalar()
+            raise OutOfStock(name or 'An item')
+
+        if row.stock_quantity is None:
+            continue
+        if row.stock_quantity <= 0:
+            sold_out = True
+        if row.stock_quantity <= row.stock_threshold < row.stock_quantity + quantity:
+            alerts.append({
+                'item_id': row.id,
+                'vendor_id': row.vendor_id,
+                'name': row.name,
+                'stock': row.stock_quantity,
+                'threshold': row.stock_threshold
+            })
+
+    return alerts, sold_out
+
+def release_stock(order_items):
+    """Return stock of cancelled or unpaid order items, re-enabling sold out items
+    Returns True if any tracked stock changed, so the menu should be invalidated.
+    """
+    restocked = False
+    for item in order_items:
+        row = db.session.execute(
+            update(MenuItem).where(
+                MenuItem.id == item.menu_item_id,
+                MenuItem.stock_quantity.isnot(None)
+            ).values(
+                stock_quantity=MenuItem.stock_quantity + item.quantity,
+                is_available=case((MenuItem.stock_quantity <= 0, True), else_=MenuItem.is_available)
+            ).returning(MenuItem.id)
+        ).first()
+        restocked = restocked or row is not None
+    return restocked
+
+def set_stock(item, quantity):
+    """Set stock on hand; tracked items are available exactly when in stock"""
+    item.stock_quantity = quantity
+    if quantity is not None:
+        item.is_available = quantity > 0
@@ -0,0 +1,247 @@
+"""
+Durable background jobs stored in the app's own database
+enqueue() adds a job to the caller's transaction, so the job exists
+exactly when the caller's write commits. Workers look for ready jobs with a
+plain SELECT, so idle polling never writes, then claim them with one
+conditional UPDATE ... RETURNING and hold them under a lease; a job whose
+worker died is claimed again once its lease expires. Failures are retried
+with exponential backoff and parked as 'failed' after max_attempts.
+
+'web' queue jobs emit SocketIO events, so a background greenlet in the web
+process drains them. Everything else runs in the web process's thread pool,
+or, with JOBS_EXTERNAL_WORKERS set, in worker processes:
+
+    flask --app "app:create_app(web=False)" jobs worker --processes 4
+"""
+
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update, delete, or_, and_, func
+from sqlalchemy.exc import OperationalError
+from models import db, Job
+from db_offload import run_in_db_thread
+
+TASKS = {}
+
+def task(name=None, queue='default', priority=0, max_attempts=None):
+    """Register a function as a job task, run later with enqueue(name, payload)"""
+    def decorator(f):
+        TASKS[name or f.__name__] = {'func': f, 'queue': queue, 'priority': priority,
+                                     'max_attempts': max_attempts}
+        return f
+    return decorator
+
+def _registry():
+    importlib.import_module('tasks')  # Registers the built-in tasks
+    return TASKS
+
+def enqueue(name, payload=None, priority=None, run_at=None, delay=None, max_attempts=None):
+    """Add a job to the current transaction; it becomes visible when the caller commits"""
+    spec = _registry()[name]
+    if run_at is None:
+        run_at = datetime.utcnow() + timedelta(seconds=delay or 0)
+    job = Job(
+        task=name,
+        payload=json.dumps(payload or {}),
+        queue=spec['queue'],
+        priority=spec['priority'] if priority is None else priority,
+        max_attempts=max_attempts or spec['max_attempts'] or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_at=run_at
+    )
+    db.session.add(job)
+    return job
+
+def _claimable(now):
+    return or_(
+        and_(Job.status == 'queued', Job.run_at <= now),
+        and_(Job.status == 'running', Job.locked_until < now)  # Lease expired: worker died
+    )
+
+def claim(queues, worker_id, limit=1):
+    """Lease up to limit ready jobs, highest priority and oldest first"""
+    db.session.commit()  # Start from a fresh transaction so the claim is one write
+    now = datetime.utcnow()
+    ready = db.session.execute(select(Job.id).where(Job.queue.in_(queues), _claimable(now)).order_by(
+        Job.priority.desc(), Job.run_at, Job.id).limit(limit)).scalars().all()
+    if not ready:
+        db.session.commit()
+        return []
+    # Another worker may claim a candidate in between; _claimable is checked again by the UPDATE
+    rows = db.session.execute(
+        update(Job).where(Job.id.in_(ready), _claimable(now)).values(
+            status='running',
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=current_app.config['JOB_LEASE_SECONDS']),
+            attempts=Job.attempts + 1
+        ).returning(Job.id, Job.task, Job.payload, Job.priority, Job.attempts, Job.max_attempts)
+    ).all()
+    db.session.commit()
+    return sorted(rows, key=lambda row: (-row.priority, row.id))
+
+def _retry_delay(attempts):
+    base = current_app.config['JOB_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1)
+    return min(base, current_app.config['JOB_RETRY_MAX_SECONDS']) * random.uniform(0.9, 1.1)
+
+def _finish(job, worker_id, error=None):
+    """Record a job's outcome, unless its lease was lost to another worker"""
+    now = datetime.utcnow()
+    if error is None:
+        values = {'status': 'done', 'finished_at': now, 'last_error': None}
+    elif job.attempts >= job.max_attempts:
+        values = {'status': 'failed', 'finished_at': now, 'last_error': error}
+    else:
+        values = {'status': 'queued', 'run_at': now + timedelta(seconds=_retry_delay(job.attempts)),
+                  'last_error': error}
+    db.session.execute(update(Job).where(Job.id == job.id, Job.locked_by == worker_id).values(
+        locked_by=None, locked_until=None, **values))
+    db.session.commit()
+
+def run_job(job, worker_id):
+    """Run one claimed job; its own writes and the outcome commit separately"""
+    spec = _registry().get(job.task)
+    try:
+        if spec is None:
+            raise LookupError(f'Unknown task {job.task}')
+        spec['func'](**json.loads(job.payload or '{}'))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+        current_app.logger.warning(f'Job {job.id} ({job.task}) failed on attempt {job.attempts}: {error}')
+        _finish(job, worker_id, error)
+        return
+    _finish(job, worker_id)
+
+def run_pending(queues, worker_id, limit=10):
+    """Claim and run one batch; returns how many jobs ran"""
+    jobs = claim(queues, worker_id, limit)
+    for job in jobs:
+        run_job(job, worker_id)
+    return len(jobs)
+
+def purge_jobs(older_than_days=None):
+    """Delete finished jobs past the retention period"""
+    days = older_than_days if older_than_days is not None else current_app.config['JOB_RETENTION_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    result = db.session.execute(delete(Job).where(Job.status.in_(['done', 'failed']), Job.finished_at < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+def start_web_worker(app, socketio):
+    """Drain JOBS_WEB_QUEUES from a background greenlet in the web process"""
+    queues = app.config['JOBS_WEB_QUEUES']
+    if not queues:
+        return
+    worker_id = f'web-{socket.gethostname()}-{os.getpid()}'
+    hub_queues = [queue for queue in queues if queue == 'web']
+    pool_queues = [queue for queue in queues if queue != 'web']
+
+    def loop():
+        while True:
+            processed = 0
+            with app.app_context():
+                try:
+                    if hub_queues:
+                        processed += run_pending(hub_queues, worker_id)
+                    if pool_queues:
+                        # QR rendering and gateway calls would block the hub; they relay their events
+                        processed += run_in_db_thread(run_pending, pool_queues, worker_id)
+                except OperationalError:
+                    db.session.rollback()  # Database busy; try again next poll
+                except Exception:
+                    app.logger.exception('Web job worker error')
+                finally:
+                    db.session.remove()
+            if not processed:
+                socketio.sleep(app.config['JOB_POLL_INTERVAL'])
+
+    socketio.start_background_task(loop)
+
+def _worker_process(config, queues, once):
+    """Entry point of one worker process"""
+    from app import create_app
+
+    app = create_app(web=False, overrides=config)
+    worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    stopping = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *args: stopping.append(True))  # Finish the current job, then exit
+
+    with app.app_context():
+        app.logger.info(f'Worker {worker_id} serving {", ".join(queues)}')
+        while not stopping:
+            try:
+                processed = run_pending(queues, worker_id)
+            except OperationalError:
+                db.session.rollback()
+                processed = 0
+            if once and not processed:
+                break
+            if not processed:
+                time.sleep(app.config['JOB_POLL_INTERVAL'])
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+@jobs_cli.command('worker')
+@click.option('--processes', '-p', type=int, default=os.cpu_count() or 1, show_default=True,
+              help='Worker processes to start.')
+@click.option('--queue', '-q', 'queues', multiple=True, default=['default'], show_default=True,
+              help='Queue to serve (repeatable).')
+@click.option('--once', is_flag=True, help='Exit when no job is ready.')
+def worker_command(processes, queues, once):
+    """Run jobs in worker processes, one per core by default."""
+    if 'web' in queues:
+        raise click.BadParameter("'web' jobs need SocketIO and run in the web process", param_hint='--queue')
+
+    db.create_all()
+    config = {key: value for key, value in current_app.config.items() if key.isupper()}
+    context = multiprocessing.get_context('spawn')  # Fresh interpreters; no inherited SQLite handles
+    workers = [context.Process(target=_worker_process, args=(config, list(queues), once))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    click.echo(f'✓ Started {processes} worker(s) on {", ".join(queues)}')
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+
+@jobs_cli.command('stats')
+def stats_command():
+    """Show job counts by queue and status."""
+    rows = db.session.query(Job.queue, Job.status, func.count(Job.id)).group_by(Job.queue, Job.status).all()
+    for queue, status, count in rows:
+        click.echo(f'{queue:<10}{status:<10}{count:>8}')
+    if not rows:
+        click.echo('No jobs')
+
+@jobs_cli.command('retry-failed')
+def retry_failed_command():
+    """Queue every failed job for one more round of attempts."""
+    result = db.session.execute(update(Job).where(Job.status == 'failed').values(
+        status='queued', attempts=0, run_at=datetime.utcnow(), finished_at=None))
+    db.session.commit()
+    click.echo(f'✓ Requeued {result.rowcount} job(s)')
+
+@jobs_cli.command('purge')
+@click.option('--days', type=int, default=None, help='Keep finished jobs this many days.')
+def purge_command(days):
+    """Delete finished jobs past the retention period."""
+    click.echo(f'✓ Purged {purge_jobs(days)} job(s)')
+
+def init_jobs(app):
+    app.cli.add_command(jobs_cli)
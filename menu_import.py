@@ -0,0 +1,209 @@
+"""
+Bulk menu import
+Loads menus from CSV or JSON, validates every row up front, resolves
+category names and vendor emails once, then upserts on (vendor, name)
+with bulk INSERT and UPDATE statements in a single transaction and
+invalidates the menu cache once at the end. Updates write only the
+optional columns the file has.
+
+Columns: name, price, category, description, is_available,
+stock_quantity, stock_threshold, and vendor_email (CLI only; the upload
+endpoint always imports into the logged-in vendor's menu).
+
+Usage: python menu_import.py menu.csv [--vendor vendor@somaiya.edu]
+"""
+
+import csv
+import io
+import json
+from sqlalchemy import insert, update, func
+from models import db, User, Category, MenuItem
+from fragment_cache import bump_version
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+INSERT_DEFAULTS = {'description': None, 'is_available': True, 'stock_quantity': None}  # New items only
+
+class MenuImportError(Exception):
+    """Raised with every row error when validation fails"""
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid row(s)')
+        self.errors = errors
+
+def parse_menu_file(stream, filename):
+    """Read rows from a CSV or JSON file object"""
+    try:
+        text = stream.read()
+        if isinstance(text, bytes):
+            text = text.decode('utf-8-sig')
+        if filename.lower().endswith('.json'):
+            rows = json.loads(text)
+            if isinstance(rows, dict):
+                rows = rows.get('items', [])
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise MenuImportError([f'Could not read {filename}: {e}'])
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise MenuImportError([f'{filename} must contain a list of menu items'])
+    if not rows:
+        raise MenuImportError([f'{filename} has no menu items'])
+    return rows
+
+def _parse_bool(value, default=True):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError('must be true or false')
+
+def _parse_int(value):
+    if value is None or value == '':
+        return None
+    number = int(value)
+    if number < 0:
+        raise ValueError('cannot be negative')
+    return number
+
+def validate_rows(rows, vendor_id=None):
+    """Validate and normalise all rows, resolving lookups once
+    Returns a list of clean dicts or raises MenuImportError.
+    """
+    categories = {name.strip().lower(): id for id, name in db.session.query(Category.id, Category.name)}
+    vendors = {}
+    if vendor_id is None:
+        emails = {str(row.get('vendor_email') or '').strip().lower() for row in rows}
+        vendors = {email.lower(): id for id, email in db.session.query(User.id, User.email).filter(
+            func.lower(User.email).in_(emails), User.role == 'vendor')}
+
+    clean, errors = [], []
+    for number, row in enumerate(rows, 1):
+        problems = []
+        name = str(row.get('name') or '').strip()
+        description = str(row.get('description') or '').strip()
+        if not name:
+            problems.append('name is required')
+        elif len(name) > 100:
+            problems.append('name is longer than 100 characters')
+        if len(description) > 300:
+            problems.append('description is longer than 300 characters')
+
+        try:
+            price = float(row.get('price'))
+            if price <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            problems.append('price must be a positive number')
+            price = None
+
+        category_id = categories.get(str(row.get('category') or '').strip().lower())
+        if category_id is None:
+            problems.append(f"unknown category '{row.get('category')}'")
+
+        row_vendor = vendor_id
+        if row_vendor is None:
+            row_vendor = vendors.get(str(row.get('vendor_email') or '').strip().lower())
+            if row_vendor is None:
+                problems.append(f"unknown vendor '{row.get('vendor_email')}'")
+
+        values = {}
+        for field, parser in (('is_available', _parse_bool), ('stock_quantity', _parse_int),
+                              ('stock_threshold', _parse_int)):
+            try:
+                values[field] = parser(row.get(field))
+            except (TypeError, ValueError) as e:
+                problems.append(f'{field} {e}' if str(e) else f'{field} is invalid')
+
+        if problems:
+            errors.append(f"Row {number}: {'; '.join(problems)}")
+            continue
+
+        # Optional columns are set only when the file has them, so an update
+        # leaves the rest of an existing item alone
+        item = {
+            'vendor_id': row_vendor,
+            'name': name,
+            'price': price,
+            'category_id': category_id
+        }
+        if 'description' in row:
+            item['description'] = description or None
+        if 'is_available' in row:
+            item['is_available'] = values['is_available']
+        if 'stock_quantity' in row:
+            item['stock_quantity'] = values['stock_quantity']
+            if values['stock_quantity'] == 0:
+                item['is_available'] = False
+        if values['stock_threshold'] is not None:
+            item['stock_threshold'] = values['stock_threshold']
+        clean.append(item)
+
+    if errors:
+        raise MenuImportError(errors)
+    return clean
+
+def import_menu(rows, vendor_id=None):
+    """Upsert menu rows on (vendor, name) in one transaction
+    Returns {'created': n, 'updated': n}.
+    """
+    items = validate_rows(rows, vendor_id)
+
+    # Later rows win when a file repeats an item
+    by_key = {}
+    for item in items:
+        by_key[(item['vendor_id'], item['name'].lower())] = item
+
+    vendor_ids = {vendor for vendor, _ in by_key}
+    existing = {(vendor, name.lower()): id for id, vendor, name in db.session.query(
+        MenuItem.id, MenuItem.vendor_id, MenuItem.name).filter(MenuItem.vendor_id.in_(vendor_ids))}
+
+    new_items, updates = [], []
+    for key, item in by_key.items():
+        if key in existing:
+            updates.append(dict(item, id=existing[key]))
+        else:
+            new_items.append(dict(INSERT_DEFAULTS, **item))
+
+    if new_items:
+        db.session.execute(insert(MenuItem), new_items)
+    if updates:
+        db.session.execute(update(MenuItem), updates)
+    db.session.commit()
+
+    bump_version('menu')
+    return {'created': len(new_items), 'updated': len(updates)}
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Bulk import menu items from CSV or JSON')
+    parser.add_argument('path')
+    parser.add_argument('--vendor', help='Import every row into this vendor (email)')
+    args = parser.parse_args()
+
+    app = create_app(web=False)
+    with app.app_context():
+        vendor_id = None
+        if args.vendor:
+            vendor = User.query.filter_by(email=args.vendor, role='vendor').first()
+            if not vendor:
+                raise SystemExit(f'✗ Vendor {args.vendor} not found')
+            vendor_id = vendor.id
+
+        try:
+            with open(args.path, 'rb') as f:
+                rows = parse_menu_file(f, args.path)
+            result = import_menu(rows, vendor_id)
+        except MenuImportError as e:
+            print(f'✗ {e}')
+            for error in e.errors:
+                print(f'  • {error}')
+            raise SystemExit(1)
+        print(f"✓ Imported {len(rows)} rows: {result['created']} created, {result['updated']} updated")
@@ -0,0 +1,89 @@
+"""
+Full-text menu search
+menu_search is an SQLite FTS5 index over menu item names and descriptions.
+It is an external-content table: it stores only the index, reads the text
+from menu_item, and is kept in sync by triggers on menu_item, so every
+write path (the vendor menu routes, bulk imports, stock updates) updates
+it in the same transaction without application code.
+
+Queries match every word, the last one as a prefix, so "masala ch" finds
+"Masala Chai" while the student is still typing. Results are ranked by
+BM25 with name matches weighted above description matches.
+"""
+
+import re
+from models import db
+
+SEARCH_TABLE = 'menu_search'
+NAME_WEIGHT = 10.0  # bm25 column weights: a name match outranks a description match
+DESCRIPTION_WEIGHT = 1.0
+
+_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        name, description, content='menu_item', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS menu_item_search_insert AFTER INSERT ON menu_item BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS menu_item_search_delete AFTER DELETE ON menu_item BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    # Only text changes touch the index; availability and stock updates are filtered by the join
+    f"""CREATE TRIGGER IF NOT EXISTS menu_item_search_update AFTER UPDATE OF name, description ON menu_item BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END"""
+]
+
+def create_search_index():
+    """Create the search index and its triggers, indexing existing items the first time"""
+    inspector = db.inspect(db.engine)
+    exists = inspector.has_table(SEARCH_TABLE)
+    for ddl in _DDL:
+        db.session.execute(db.text(ddl))
+    if not exists:
+        db.session.execute(db.text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+    db.session.commit()
+
+def match_query(text):
+    """FTS5 query for what the student typed, or None if it has no words
+    Words are quoted, so FTS5 operators and punctuation in the input are inert.
+    """
+    words = re.findall(r'\w+', text.lower())[:8]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+def search_menu(text, limit=30):
+    """Available items matching text, best match first"""
+    query = match_query(text)
+    if query is None:
+        return []
+    return db.session.execute(db.text(f"""
+        SELECT m.id, m.name, m.description, m.price, m.vendor_id, u.full_name AS vendor_name
+        FROM {SEARCH_TABLE} JOIN menu_item m ON m.id = {SEARCH_TABLE}.rowid
+        JOIN "user" u ON u.id = m.vendor_id
+        WHERE {SEARCH_TABLE} MATCH :query AND m.is_available
+        ORDER BY bm25({SEARCH_TABLE}, :name_weight, :description_weight)
+        LIMIT :limit
+    """), {'query': query, 'name_weight': NAME_WEIGHT, 'description_weight': DESCRIPTION_WEIGHT,
+           'limit': limit}).all()
+
+def suggest_menu(text, limit=8):
+    """Distinct names of available items whose name matches text, for type-ahead"""
+    query = match_query(text)
+    if query is None:
+        return []
+    rows = db.session.execute(db.text(f"""
+        SELECT m.name FROM {SEARCH_TABLE} JOIN menu_item m ON m.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH :query AND m.is_available
+        ORDER BY bm25({SEARCH_TABLE})
+        LIMIT :candidates
+    """), {'query': f'name : ({query})', 'candidates': limit * 5}).scalars()
+    # The same dish is often sold by several vendors
+    names = {}
+    for name in rows:
+        names.setdefault(name.lower(), name)
+    return list(names.values())[:limit]
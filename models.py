@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password, needs_rehash
 from datetime import datetime
 import json
 
@@ -22,10 +22,14 @@ class User(UserMixin, db.Model):
     menu_items = db.relationship('MenuItem', backref='vendor', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check if the stored hash uses an outdated work factor"""
+        return needs_rehash(self.password_hash)
     
     def get_slot_config(self):
         """Get slot configuration as dict"""
@@ -56,12 +60,16 @@ class MenuItem(db.Model):
     vendor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     is_available = db.Column(db.Boolean, default=True)
     stock_threshold = db.Column(db.Integer, default=10)  # Low stock alert threshold
+    stock_quantity = db.Column(db.Integer)  # Stock on hand; None means not tracked
     image_url = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     order_items = db.relationship('OrderItem', backref='menu_item', lazy=True)
 
+# Orders in these states no longer hold a pickup slot
+RELEASED_ORDER_STATUSES = ('cancelled', 'expired')
+
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_number = db.Column(db.String(20), unique=True, nullable=False)
@@ -69,9 +77,10 @@ class Order(db.Model):
     vendor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(db.String(20), nullable=False)  # 'online' or 'cod'
-    payment_status = db.Column(db.String(20), default='pending')  # 'pending', 'paid', 'failed'
-    order_status = db.Column(db.String(30), default='placed')  # 'placed', 'confirmed', 'preparing', 'ready', 'picked_up', 'cancelled'
+    payment_status = db.Column(db.String(20), default='pending')  # 'pending', 'paid', 'failed', 'refund_pending', 'refunded'
+    order_status = db.Column(db.String(30), default='placed')  # 'placed', 'confirmed', 'preparing', 'ready', 'picked_up', 'cancelled', 'expired'
     pickup_time = db.Column(db.String(10), nullable=False)
+    pickup_deadline = db.Column(db.DateTime)  # pickup_time as a UTC datetime; expiry starts from here
     special_instructions = db.Column(db.Text)
     qr_code_path = db.Column(db.String(200))
     razorpay_order_id = db.Column(db.String(100))
@@ -82,6 +91,23 @@ class Order(db.Model):
     
     # Relationships
     order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    
+    # Never reuse ids of archived orders (older databases are rebuilt by add_missing_columns)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    @classmethod
+    def holding_slot(cls):
+        """Filter for orders that still count against their pickup slot's capacity"""
+        return cls.order_status.notin_(RELEASED_ORDER_STATUSES)
+
+class OrderEvent(db.Model):
+    """Append-only record of an order entering a status"""
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, nullable=False)  # No foreign key: events outlive archived orders
+    vendor_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    pickup_time = db.Column(db.String(10))  # Slot, recorded on 'placed' events
+    at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -89,4 +115,145 @@ class OrderItem(db.Model):
     menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Never reuse ids of archived order items
+    __table_args__ = {'sqlite_autoincrement': True}
+
+class ArchivedOrder(db.Model):
+    """Cold copy of a completed order, keyed by its original id"""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_number = db.Column(db.String(20), unique=True, nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    total_amount = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(db.String(20), nullable=False)
+    payment_status = db.Column(db.String(20))
+    order_status = db.Column(db.String(30))
+    pickup_time = db.Column(db.String(10), nullable=False)
+    pickup_deadline = db.Column(db.DateTime)
+    special_instructions = db.Column(db.Text)
+    qr_code_path = db.Column(db.String(200))
+    razorpay_order_id = db.Column(db.String(100))
+    razorpay_payment_id = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    picked_up_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    order_items = db.relationship('ArchivedOrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    customer = db.relationship('User', foreign_keys=[student_id])
+
+class ArchivedOrderItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('archived_order.id'), nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime)
+    
+    # Relationships
+    menu_item = db.relationship('MenuItem')
+
+class OrderRollup(db.Model):
+    """Per-vendor daily totals of archived orders"""
+    vendor_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    picked_up_count = db.Column(db.Integer, default=0, nullable=False)
+    cancelled_count = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0, nullable=False)
+
+class SlotForecast(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    slot_time = db.Column(db.String(10), nullable=False)  # 'HH:MM'
+    forecast = db.Column(db.Float, nullable=False)  # Smoothed expected orders
+    recommended_capacity = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('vendor_id', 'weekday', 'slot_time', name='uq_slot_forecast'),
+    )
+
+class Job(db.Model):
+    """Durable background job; claimed by workers under a time-limited lease"""
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # JSON arguments
+    queue = db.Column(db.String(20), nullable=False, default='default')  # 'web' jobs run in the web process
+    priority = db.Column(db.Integer, nullable=False, default=0)  # Higher runs first
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_job_ready', 'queue', 'status', 'run_at'),
+    )
+
+class Setting(db.Model):
+    """Runtime-adjustable setting, stored as JSON under a key"""
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def add_missing_columns():
+    """Add columns introduced after a table was created (there is no migration tool)
+    and rebuild the order tables of databases created before they used AUTOINCREMENT
+    """
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column.type.compile(db.engine.dialect)}'
+            if column.default is not None and column.default.is_scalar:
+                default = column.default.arg
+                ddl += f" DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+            db.session.execute(db.text(ddl))
+    db.session.commit()
+
+    # Archived rows keep their live ids, so the live tables must never hand them out again
+    for table, archive in ((Order.__table__, ArchivedOrder.__table__),
+                           (OrderItem.__table__, ArchivedOrderItem.__table__)):
+        _add_autoincrement(table, archive)
+
+def _add_autoincrement(table, archive):
+    """Rebuild a SQLite table created without AUTOINCREMENT, starting its id
+    sequence above every id used by the table or its archive
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as connection:
+        sql = connection.execute(db.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                 {'name': table.name}).scalar()
+        if sql is None or 'AUTOINCREMENT' in sql.upper():
+            return
+        inspector = db.inspect(connection)
+        old = f'{table.name}_old'
+        columns = ', '.join(f'"{column["name"]}"' for column in inspector.get_columns(table.name)
+                            if column['name'] in table.c)
+        # Keep other tables' foreign keys pointing at the name, not at the renamed copy
+        connection.execute(db.text('PRAGMA legacy_alter_table = ON'))
+        connection.execute(db.text(f'ALTER TABLE "{table.name}" RENAME TO "{old}"'))
+        for index in inspector.get_indexes(old):
+            connection.execute(db.text(f'DROP INDEX "{index["name"]}"'))
+        table.create(connection)
+        connection.execute(db.text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old}"'))
+        connection.execute(db.text(f'DROP TABLE "{old}"'))
+        connection.execute(db.text('PRAGMA legacy_alter_table = OFF'))
+        connection.execute(db.text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table.name})
+        connection.execute(db.text(f'''INSERT INTO sqlite_sequence (name, seq) SELECT :name, max(
+            (SELECT coalesce(max(id), 0) FROM "{table.name}"),
+            (SELECT coalesce(max(id), 0) FROM "{archive.name}"))'''), {'name': table.name})
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Order lifecycle events and kitchen latency percentiles
+Every status an order enters is appended to OrderEvent, so transitions
+are never overwritten. LatencyAggregator reads the log as a stream: each
+call folds in only the events appended since its cursor, pairing
+placed -> ready (time to ready) and ready -> picked_up (ready to pickup)
+per order. Durations go into small log-bucketed sketches per vendor,
+slot and day, which merge into percentiles over the last
+ORDER_LATENCY_WINDOW_DAYS without keeping individual samples.
+"""
+
+import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, delete, func
+from models import db, OrderEvent
+
+METRICS = ('time_to_ready', 'ready_to_pickup')
+PERCENTILES = (50, 90, 99)
+CLOSED_STATUSES = ('picked_up', 'cancelled', 'expired')
+
+def record_status(order_id, vendor_id, status, pickup_time=None):
+    """Append a status event to the current transaction"""
+    db.session.add(OrderEvent(order_id=order_id, vendor_id=vendor_id, status=status, pickup_time=pickup_time))
+
+def record_statuses(rows, status):
+    """Append one event per row (with id and vendor_id) in a single INSERT"""
+    if rows:
+        now = datetime.utcnow()
+        db.session.execute(insert(OrderEvent), [
+            {'order_id': row.id, 'vendor_id': row.vendor_id, 'status': status, 'at': now} for row in rows])
+
+def purge_order_events(older_than_days=None):
+    """Delete events past the retention period"""
+    days = older_than_days if older_than_days is not None else current_app.config['ORDER_EVENT_RETENTION_DAYS']
+    result = db.session.execute(delete(OrderEvent).where(OrderEvent.at < datetime.utcnow() - timedelta(days=days)))
+    db.session.commit()
+    return result.rowcount
+
+class LatencySketch:
+    """Log-bucketed histogram of durations
+    Any percentile is within ACCURACY of the true value, using one counter
+    per occupied bucket (a few dozen for minutes to hours). Sketches merge
+    by adding counters.
+    """
+    ACCURACY = 0.02
+    GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+
+    def add(self, seconds):
+        self.counts[math.ceil(math.log(max(seconds, 1)) / math.log(self.GAMMA))] += 1
+        self.count += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.count += other.count
+        return self
+
+    def percentile(self, p):
+        """Estimated p-th percentile in seconds (nearest rank)"""
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return 2 * self.GAMMA ** index / (self.GAMMA + 1)  # Bucket midpoint
+        return 0
+
+    def summary(self):
+        """Count and percentiles in minutes"""
+        stats = {'count': self.count}
+        for p in PERCENTILES:
+            stats[f'p{p}'] = round(self.percentile(p) / 60, 1)
+        return stats
+
+class LatencyAggregator:
+    """Streaming per-vendor, per-slot latency percentiles over the order event log"""
+
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.cursor = None  # Last event id folded in
+        self.open = {}  # order_id -> [placed at, ready at, slot]
+        self.days = defaultdict(lambda: defaultdict(dict))  # day -> vendor_id -> {(metric, slot): sketch}
+        self._lock = threading.Lock()
+
+    def _window_start(self):
+        return datetime.utcnow() - timedelta(days=current_app.config['ORDER_LATENCY_WINDOW_DAYS'])
+
+    def _add(self, vendor_id, metric, slot, at, duration):
+        sketches = self.days[at.date()][vendor_id]
+        for key in ((metric, None), (metric, slot)):  # Vendor-wide and per slot
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = LatencySketch()
+            sketch.add(duration.total_seconds())
+
+    def _fold(self, event):
+        if event.status == 'placed':
+            self.open[event.order_id] = [event.at, None, event.pickup_time]
+            return
+        state = self.open.get(event.order_id)
+        if state is None:
+            return  # Placed before the window
+        placed_at, ready_at, slot = state
+        if event.status == 'ready' and ready_at is None:
+            state[1] = event.at
+            self._add(event.vendor_id, 'time_to_ready', slot, event.at, event.at - placed_at)
+        elif event.status == 'picked_up' and ready_at is not None:
+            self._add(event.vendor_id, 'ready_to_pickup', slot, event.at, event.at - ready_at)
+        if event.status in CLOSED_STATUSES:
+            del self.open[event.order_id]
+
+    def consume(self):
+        """Fold in events appended since the last call; returns how many were read"""
+        read = 0
+        with self._lock:
+            window_start = self._window_start()
+            if self.cursor is None:
+                first = db.session.query(func.min(OrderEvent.id)).filter(OrderEvent.at >= window_start).scalar()
+                self.cursor = first - 1 if first else db.session.query(func.max(OrderEvent.id)).scalar() or 0
+            while True:
+                events = db.session.query(
+                    OrderEvent.id, OrderEvent.order_id, OrderEvent.vendor_id, OrderEvent.status,
+                    OrderEvent.pickup_time, OrderEvent.at
+                ).filter(OrderEvent.id > self.cursor).order_by(OrderEvent.id).limit(self.batch_size).all()
+                for event in events:
+                    self._fold(event)
+                if events:
+                    self.cursor = events[-1].id
+                read += len(events)
+                if len(events) < self.batch_size:
+                    break
+
+            # Slide the window: drop old days and orders that never closed
+            for day in [day for day in self.days if day < window_start.date()]:
+                del self.days[day]
+            self.open = {order_id: state for order_id, state in self.open.items() if state[0] >= window_start}
+        return read
+
+    def report(self, vendor_id):
+        """{'overall': {metric: stats}, 'slots': [{'slot', metric: stats}]} over the window"""
+        merged = defaultdict(LatencySketch)
+        start = self._window_start().date()
+        with self._lock:
+            for day, vendors in self.days.items():
+                if day >= start:
+                    for key, sketch in vendors.get(vendor_id, {}).items():
+                        merged[key].merge(sketch)
+
+        overall = {metric: merged[(metric, None)].summary() if (metric, None) in merged else None
+                   for metric in METRICS}
+        slots = sorted({slot for metric, slot in merged if slot is not None})
+        return {
+            'overall': overall,
+            'slots': [dict({'slot': slot}, **{metric: merged[(metric, slot)].summary() if (metric, slot) in merged
+                                              else None for metric in METRICS}) for slot in slots]
+        }
+
+latency_aggregator = LatencyAggregator()
@@ -0,0 +1,59 @@
+"""
+Password hashing off the eventlet hub
+Hashing is CPU-bound and would freeze every greenlet (including all
+SocketIO traffic) if run on the hub, so it runs in eventlet's native
+thread pool behind a concurrency limit. The hash method and work factor
+come from PASSWORD_HASH_METHOD; older hashes are upgraded on login.
+"""
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+DEFAULT_CONCURRENCY = 4
+
+_semaphore = None
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+def _run_offloaded(func, *args):
+    """Run func in a real OS thread, limiting concurrent hashes"""
+    global _semaphore
+    if not _config('PASSWORD_HASH_OFFLOAD', True):
+        return func(*args)
+
+    from eventlet import tpool
+    from eventlet.semaphore import Semaphore
+
+    if _semaphore is None:
+        _semaphore = Semaphore(_config('PASSWORD_HASH_CONCURRENCY', DEFAULT_CONCURRENCY))
+    with _semaphore:
+        return tpool.execute(func, *args)
+
+def hash_password(password):
+    """Hash a password with the configured method and work factor"""
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    return _run_offloaded(generate_password_hash, password, method)
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash"""
+    return _run_offloaded(check_password_hash, password_hash, password)
+
+def _normalize_method(method):
+    """Method string with werkzeug's defaults filled in, e.g. 'scrypt' -> 'scrypt:32768:8:1'"""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        args = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else str(DEFAULT_PBKDF2_ITERATIONS)
+        args = [hash_name, iterations]
+    return ':'.join([name] + args)
+
+def needs_rehash(password_hash):
+    """True if the hash was made with a different method or work factor"""
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    return _normalize_method(password_hash.split('$', 1)[0]) != _normalize_method(method)
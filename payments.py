@@ -0,0 +1,258 @@
+"""
+Payment gateway access and reconciliation
+The gateway is built on first use and kept in app.extensions. Importing
+razorpay pulls in requests and its dependency tree, so the web app only
+pays for it when the first online payment is made. PAYMENT_GATEWAY='stub'
+swaps in an in-memory gateway for local development and tests.
+
+Online orders start out 'pending'. If the student abandons the Razorpay
+modal, or the browser never reports back, reconcile_payments() settles
+them: one paged listing of the gateway's recent payments is matched
+against every stale pending order, orders with a captured payment are
+marked paid and orders past PAYMENT_PENDING_TIMEOUT_MINUTES are cancelled,
+releasing their pickup slot and stock. Checkout queues a sweep for when
+each online order would expire; also run this script periodically.
+
+A payment that reaches payment_success after its order was cancelled is
+stored on the order as 'refund_pending' and refunded by a background job.
+If the gateway refuses, the order stays 'refund_pending' for manual review.
+"""
+
+import hashlib
+import hmac
+import itertools
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import update, case
+from models import db, Order, OrderItem
+from inventory import release_stock
+from jobs import enqueue
+from order_events import record_statuses
+
+SETTLED_PAYMENT_STATUSES = ('authorized', 'captured')  # Payments that pay for their order
+
+def to_paise(amount):
+    """Rupee amount as integer paise, rounded so float error never loses a paisa"""
+    return int(round(amount * 100))
+
+def sign_payment(gateway_order_id, payment_id, secret):
+    """Razorpay's checkout signature: HMAC-SHA256 of 'order_id|payment_id'"""
+    message = f'{gateway_order_id}|{payment_id}'.encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+class RazorpayGateway:
+    """Razorpay over one pooled, retrying HTTPS session"""
+    PAGE_SIZE = 100  # Largest page the payments API returns
+
+    def __init__(self, key_id, key_secret, pool_size):
+        import razorpay
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.key_secret = key_secret
+        self.client = razorpay.Client(auth=(key_id, key_secret))
+        # Reads are safe to retry; order creation is not, so POSTs fail fast
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']))
+        self.client.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                                          max_retries=retry))
+
+    def create_order(self, amount, receipt):
+        """Create a gateway order for amount paise; returns its id"""
+        return self.client.order.create({
+            'amount': amount,
+            'currency': 'INR',
+            'receipt': receipt,
+            'payment_capture': 1
+        })['id']
+
+    def refund(self, payment_id):
+        """Refund a captured payment in full"""
+        self.client.payment.refund(payment_id, {})
+
+    def payments_between(self, start, end):
+        """Every payment created between two naive UTC datetimes, a page at a time"""
+        params = {
+            'from': int(start.replace(tzinfo=timezone.utc).timestamp()),
+            'to': int(end.replace(tzinfo=timezone.utc).timestamp()),
+            'count': self.PAGE_SIZE
+        }
+        for skip in itertools.count(0, self.PAGE_SIZE):
+            items = self.client.payment.all(dict(params, skip=skip)).get('items', [])
+            yield from items
+            if len(items) < self.PAGE_SIZE:
+                return
+
+    def verify_signature(self, gateway_order_id, payment_id, signature):
+        expected = sign_payment(gateway_order_id, payment_id, self.key_secret)
+        return hmac.compare_digest(expected, signature or '')
+
+class StubGateway:
+    """In-memory gateway for development and tests
+    record_payment() stands in for a student completing the checkout modal.
+    """
+
+    def __init__(self, key_secret):
+        self.key_secret = key_secret
+        self.orders = {}
+        self.payments = []
+        self.refunds = []
+        self._ids = itertools.count(1)
+
+    def create_order(self, amount, receipt):
+        gateway_order_id = f'order_stub{next(self._ids)}'
+        self.orders[gateway_order_id] = {'amount': amount, 'receipt': receipt}
+        return gateway_order_id
+
+    def record_payment(self, gateway_order_id, status='captured', amount=None):
+        """Add a payment to a gateway order; returns (payment_id, signature)"""
+        payment_id = f'pay_stub{next(self._ids)}'
+        self.payments.append({
+            'id': payment_id,
+            'order_id': gateway_order_id,
+            'amount': self.orders[gateway_order_id]['amount'] if amount is None else amount,
+            'status': status,
+            'created_at': datetime.utcnow()
+        })
+        return payment_id, sign_payment(gateway_order_id, payment_id, self.key_secret)
+
+    def refund(self, payment_id):
+        self.refunds.append(payment_id)
+
+    def payments_between(self, start, end):
+        return [p for p in self.payments if start <= p['created_at'] <= end]
+
+    def verify_signature(self, gateway_order_id, payment_id, signature):
+        expected = sign_payment(gateway_order_id, payment_id, self.key_secret)
+        return hmac.compare_digest(expected, signature or '')
+
+def get_gateway():
+    """The app's payment gateway, built lazily and kept in app.extensions"""
+    gateway = current_app.extensions.get('payment_gateway')
+    if gateway is None:
+        config = current_app.config
+        if config['PAYMENT_GATEWAY'] == 'stub':
+            gateway = StubGateway(config['RAZORPAY_KEY_SECRET'])
+        else:
+            gateway = RazorpayGateway(config['RAZORPAY_KEY_ID'], config['RAZORPAY_KEY_SECRET'],
+                                      config['PAYMENT_POOL_SIZE'])
+        current_app.extensions['payment_gateway'] = gateway
+    return gateway
+
+def mark_paid(payments):
+    """Mark pending orders paid from {order_id: payment_id} in one UPDATE
+    Orders another request settled first are left alone. Queues their QR
+    codes, capacity checks and trending counts, and returns the rows that
+    changed so the caller can notify vendors.
+    """
+    if not payments:
+        return []
+    rows = db.session.execute(
+        update(Order).where(Order.id.in_(list(payments)), Order.payment_status == 'pending').values(
+            payment_status='paid',
+            razorpay_payment_id=case(payments, value=Order.id)
+        ).returning(Order.id, Order.order_number, Order.vendor_id, Order.total_amount, Order.pickup_time)
+    ).all()
+    for row in rows:
+        enqueue('render_order_qr', {'order_id': row.id})
+        enqueue('check_slot_capacity', {'vendor_id': row.vendor_id, 'slot_time': row.pickup_time})
+        enqueue('record_trending', {'order_id': row.id})
+    return rows
+
+def release_unpaid(order_ids):
+    """Cancel pending orders whose payment never arrived, returning their slot and stock
+    Returns the rows that changed and whether any stock was restocked.
+    """
+    if not order_ids:
+        return [], False
+    rows = db.session.execute(
+        update(Order).where(Order.id.in_(order_ids), Order.payment_status == 'pending').values(
+            payment_status='failed',
+            order_status='cancelled'
+        ).returning(Order.id, Order.vendor_id, Order.student_id)
+    ).all()
+    record_statuses(rows, 'cancelled')
+    items = OrderItem.query.filter(OrderItem.order_id.in_([row.id for row in rows])).all() if rows else []
+    return rows, release_stock(items)
+
+def hold_for_refund(order_id, payment_id):
+    """Record a verified payment for a cancelled order and queue its refund
+    Returns False if the order is not cancelled for non-payment.
+    """
+    result = db.session.execute(
+        update(Order).where(Order.id == order_id, Order.payment_status == 'failed').values(
+            payment_status='refund_pending',
+            razorpay_payment_id=payment_id
+        ))
+    if not result.rowcount:
+        return False
+    enqueue('refund_payment', {'order_id': order_id})
+    return True
+
+def refund_payment(order_id):
+    """Refund a 'refund_pending' order's payment; a gateway error leaves it pending for retry"""
+    order = db.session.get(Order, order_id)
+    if order is None or order.payment_status != 'refund_pending':
+        return
+    get_gateway().refund(order.razorpay_payment_id)
+    order.payment_status = 'refunded'
+    db.session.commit()
+
+def reconcile_payments(now=None):
+    """Settle stale pending online orders against the gateway
+    Returns {'paid': n, 'failed': n}.
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    pending = db.session.query(Order.id, Order.razorpay_order_id, Order.total_amount, Order.created_at).filter(
+        Order.payment_method == 'online',
+        Order.payment_status == 'pending',
+        Order.created_at < now - timedelta(seconds=config['PAYMENT_RECONCILE_GRACE_SECONDS'])
+    ).order_by(Order.created_at).limit(config['PAYMENT_RECONCILE_BATCH']).all()
+    db.session.commit()  # Hold no transaction open across gateway calls
+    if not pending:
+        return {'paid': 0, 'failed': 0}
+
+    # One listing covers the whole batch instead of a request per order
+    by_gateway_order = {order.razorpay_order_id: order for order in pending if order.razorpay_order_id}
+    paid = {}
+    for payment in get_gateway().payments_between(pending[0].created_at - timedelta(minutes=1), now):
+        order = by_gateway_order.get(payment.get('order_id'))
+        if (order is not None and payment.get('status') in SETTLED_PAYMENT_STATUSES
+                and payment.get('amount') == to_paise(order.total_amount)):
+            paid[order.id] = payment['id']
+
+    expires_before = now - timedelta(minutes=config['PAYMENT_PENDING_TIMEOUT_MINUTES'])
+    expired = [order.id for order in pending if order.id not in paid and order.created_at < expires_before]
+
+    paid_rows = mark_paid(paid)
+    failed_rows, restocked = release_unpaid(expired)
+
+    # Events and cache invalidation belong to the web process, which may not be this one
+    for row in paid_rows:
+        enqueue('emit_event', {
+            'event': 'new_order',
+            'data': {'order_id': row.id, 'order_number': row.order_number,
+                     'total_amount': row.total_amount, 'pickup_time': row.pickup_time},
+            'room': f'vendor_{row.vendor_id}'
+        })
+    for row in failed_rows:
+        enqueue('emit_event', {
+            'event': 'order_status_update',
+            'data': {'order_id': row.id, 'status': 'cancelled',
+                     'message': 'Payment was not received, so the order was cancelled'},
+            'room': f'student_{row.student_id}'
+        })
+    if restocked:
+        enqueue('bump_cache_version', {'namespace': 'menu'})
+    db.session.commit()
+
+    return {'paid': len(paid_rows), 'failed': len(failed_rows)}
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app(web=False)
+    with app.app_context():
+        result = reconcile_payments()
+        print(f"✓ Reconciled payments: {result['paid']} paid, {result['failed']} cancelled")
@@ -0,0 +1,67 @@
+"""
+Replayable SocketIO events
+Every event sent to a room is stamped with a per-room sequence number and
+kept in a bounded ring buffer. A reconnecting client sends the last
+sequence number it saw and receives only the events it missed; it is
+told to do a full resync when the gap is older than the buffer or the
+server has restarted (different epoch).
+"""
+
+import threading
+import uuid
+from collections import OrderedDict, deque
+from flask_login import current_user
+
+def user_room(user):
+    """SocketIO room a user joins on connect"""
+    return f'{user.role}_{user.id}'
+
+class EventStream:
+    def __init__(self, buffer_size=50, max_rooms=5000):
+        self.buffer_size = buffer_size
+        self.max_rooms = max_rooms
+        self.epoch = uuid.uuid4().hex[:12]
+        self.socketio = None
+        self._rooms = OrderedDict()  # room -> [last_seq, deque of (seq, event, data)]
+        self._lock = threading.Lock()
+
+    def init_app(self, app, socketio):
+        self.buffer_size = app.config['REPLAY_BUFFER_SIZE']
+        self.socketio = socketio
+        app.jinja_env.globals['event_cursor'] = lambda: self.cursor(user_room(current_user))
+
+    def emit(self, event, data, room):
+        """Stamp, buffer and emit an event to a room"""
+        with self._lock:
+            state = self._rooms.get(room)
+            if state is None:
+                state = self._rooms[room] = [0, deque(maxlen=self.buffer_size)]
+                while len(self._rooms) > self.max_rooms:
+                    self._rooms.popitem(last=False)
+            self._rooms.move_to_end(room)
+            state[0] += 1
+            payload = dict(data, seq=state[0], epoch=self.epoch)
+            state[1].append((state[0], event, payload))
+        self.socketio.emit(event, payload, room=room)
+
+    def cursor(self, room):
+        """Current position of a room, rendered into pages for their first connect"""
+        state = self._rooms.get(room)
+        return {'seq': state[0] if state else 0, 'epoch': self.epoch}
+
+    def replay(self, room, last_seq, epoch):
+        """Events after last_seq, or a full resync request if they are gone"""
+        with self._lock:
+            state = self._rooms.get(room)
+            current = state[0] if state else 0
+            if epoch != self.epoch or last_seq is None or last_seq > current:
+                return {'full_resync': True, 'seq': current, 'epoch': self.epoch}
+            buffered = list(state[1]) if state else []
+
+        if last_seq < current and (not buffered or buffered[0][0] > last_seq + 1):
+            return {'full_resync': True, 'seq': current, 'epoch': self.epoch}
+
+        events = [{'event': event, 'data': data} for seq, event, data in buffered if seq > last_seq]
+        return {'full_resync': False, 'events': events, 'seq': current, 'epoch': self.epoch}
+
+event_stream = EventStream()
@@ -0,0 +1,139 @@
+"""
+Pickup slot recommendations
+Every cart view ranks the offered slots so students spread across them
+instead of all taking the first one. A slot's score adds up, in units of
+"one full slot":
+
+- fill: orders already booked / capacity
+- demand: orders the forecast still expects (forecast - booked) / capacity
+- delay: minutes the kitchen, at its current throughput, would finish
+  the slot late, per SLOT_MINUTES
+- wait: hours until the slot, times SLOT_RECOMMEND_WAIT_WEIGHT, so a
+  quiet later slot does not beat an equally quiet sooner one
+
+Lowest score wins. Scoring reads only in-memory state: per-vendor booking
+counts for today (bumped at checkout and reloaded with one GROUP BY every
+SLOT_COUNTS_REFRESH_SECONDS, which also picks up cancellations and
+expiries), forecasts cached per vendor and weekday, and the kitchen
+throughput from wait_times.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func
+from models import db, Order, SlotForecast
+from utils import SLOT_MINUTES  # Not forecasting: that module loads numpy
+from wait_times import throughput
+
+DEFAULT_CAPACITY = 20
+FORECAST_CACHE_SECONDS = 600  # Forecasts change once a night
+
+class SlotBookings:
+    """Today's slot-holding orders per vendor and pickup slot"""
+
+    def __init__(self):
+        self._vendors = {}  # vendor_id -> (day, loaded at, Counter of pickup_time)
+        self._lock = threading.Lock()
+
+    def _load(self, vendor_id, today):
+        return Counter(dict(db.session.query(Order.pickup_time, func.count(Order.id)).filter(
+            Order.vendor_id == vendor_id, Order.holding_slot(), Order.created_at >= today
+        ).group_by(Order.pickup_time).all()))
+
+    def counts(self, vendor_id):
+        today = datetime.now().date()
+        now = time.monotonic()
+        entry = self._vendors.get(vendor_id)
+        if entry is None or entry[0] != today or now - entry[1] >= current_app.config['SLOT_COUNTS_REFRESH_SECONDS']:
+            counts = self._load(vendor_id, today)
+            with self._lock:
+                self._vendors[vendor_id] = entry = (today, now, counts)
+        return entry[2]
+
+    def add(self, vendor_id, pickup_time):
+        """Count a committed checkout until the next reload"""
+        with self._lock:
+            entry = self._vendors.get(vendor_id)
+            if entry is not None:
+                entry[2][pickup_time] += 1
+
+slot_bookings = SlotBookings()
+
+def slot_capacity(slot_config, slot):
+    """Orders a slot takes: the vendor's setting, or DEFAULT_CAPACITY"""
+    return slot_config.get(slot, {}).get('capacity', DEFAULT_CAPACITY)
+
+def slot_unavailable(slot_config, slot, booked):
+    """Why a slot with booked orders cannot take another ('Unavailable' or 'Full'), or None
+    The cart and checkout both use this, so the cart never offers a slot checkout refuses.
+    """
+    if slot_config.get(slot, {}).get('blackout', False):
+        return 'Unavailable'
+    if booked >= slot_capacity(slot_config, slot):
+        return 'Full'
+    return None
+
+_forecasts = {}  # (vendor_id, weekday) -> (loaded at, {slot_time: forecast})
+
+def slot_forecasts(vendor_id, weekday):
+    now = time.monotonic()
+    entry = _forecasts.get((vendor_id, weekday))
+    if entry is None or now - entry[0] >= FORECAST_CACHE_SECONDS:
+        entry = _forecasts[(vendor_id, weekday)] = (now, dict(db.session.query(
+            SlotForecast.slot_time, SlotForecast.forecast).filter(
+            SlotForecast.vendor_id == vendor_id, SlotForecast.weekday == weekday).all()))
+    return entry[1]
+
+def rank_slots(vendor_id, time_slots, slot_config):
+    """Score the offered slots, best first
+    Returns [{'slot', 'available', 'reason', 'booked', 'capacity', 'percentage', 'score'}];
+    unavailable slots (blackout or full) are ranked last.
+    """
+    now = datetime.now()
+    booked = slot_bookings.counts(vendor_id)
+    forecasts = slot_forecasts(vendor_id, now.weekday())
+    rate = throughput.rate(vendor_id)
+    wait_weight = current_app.config['SLOT_RECOMMEND_WAIT_WEIGHT']
+
+    ranked = []
+    ahead = 0  # Orders booked up to and including this slot, as a queue estimate
+    for slot in time_slots:
+        capacity = slot_capacity(slot_config, slot)
+        count = booked[slot]
+        ahead += count
+        hour, minute = map(int, slot.split(':'))
+        until = (now.replace(hour=hour, minute=minute, second=0, microsecond=0) - now).total_seconds() / 60
+        if until < -12 * 60:
+            until += 24 * 60  # Past midnight
+
+        info = {'slot': slot, 'booked': count, 'capacity': capacity,
+                'percentage': int(count / capacity * 100) if capacity > 0 else 100}
+        reason = slot_unavailable(slot_config, slot, count)
+        if reason:
+            info.update(available=False, reason=reason, score=float('inf'))
+        else:
+            fill = count / capacity
+            demand = max(0.0, forecasts.get(slot, 0.0) - count) / capacity
+            delay = max(0.0, (ahead + 1) / rate - until) / SLOT_MINUTES  # + the new order
+            info.update(available=True, reason=None,
+                        score=round(fill + demand + delay + wait_weight * max(until, 0) / 60, 3))
+        ranked.append(info)
+
+    ranked.sort(key=lambda info: info['score'])
+    return ranked
+
+def alternatives_for(ranked, pickup_time):
+    """Better available slots than pickup_time when one more order brings it close to
+    capacity, best first. Returns [] if the slot has room or nothing scores better.
+    """
+    config = current_app.config
+    chosen = next((info for info in ranked if info['slot'] == pickup_time), None)
+    if chosen is None or (chosen['available']
+                          and chosen['booked'] + 1 < chosen['capacity'] * config['SLOT_NEAR_FULL_RATIO']):
+        return []
+    return [info['slot'] for info in ranked
+            if info['available'] and info['slot'] != pickup_time
+            and info['score'] < chosen['score']][:config['SLOT_RECOMMEND_ALTERNATIVES']]
@@ -80,6 +80,87 @@ if (typeof io !== 'undefined') {
     });
 }
 
+// Socket that replays events missed while disconnected
+// handlers: {eventName: fn(data)}, onFullResync: called when the gap is too old,
+// cursor: {seq, epoch} of the room when the page was rendered
+function connectReplayable(handlers, onFullResync, cursor) {
+    const socket = io();
+    let lastSeq = cursor ? cursor.seq : null;
+    let epoch = cursor ? cursor.epoch : null;
+
+    function deliver(event, data) {
+        if (data.seq !== undefined) {
+            if (data.epoch === epoch && lastSeq !== null && data.seq <= lastSeq) {
+                return; // Already seen
+            }
+            lastSeq = data.seq;
+            epoch = data.epoch;
+        }
+        if (handlers[event]) {
+            handlers[event](data);
+        }
+    }
+
+    Object.keys(handlers).forEach(event => {
+        socket.on(event, data => deliver(event, data));
+    });
+
+    socket.on('connect', function() {
+        socket.emit('resync', { last_seq: lastSeq, epoch: epoch }, function(reply) {
+            if (reply.full_resync) {
+                lastSeq = reply.seq;
+                epoch = reply.epoch;
+                if (onFullResync) {
+                    onFullResync();
+                }
+                return;
+            }
+            reply.events.forEach(e => deliver(e.event, e.data));
+        });
+    });
+
+    return socket;
+}
+
+// Write requests may be held in the waiting room at rush peaks (429 with a
+// position in line); wait to be called over SocketIO, or for retry_after
+// seconds, then send the request again
+let admissionSocket = null;
+
+function waitForTurn(retryAfter) {
+    return new Promise(resolve => {
+        const timer = setTimeout(done, retryAfter * 1000);
+        function done() {
+            clearTimeout(timer);
+            if (admissionSocket) {
+                admissionSocket.off('admission_ready', done);
+            }
+            resolve();
+        }
+        if (typeof io !== 'undefined') {
+            admissionSocket = admissionSocket || io();
+            admissionSocket.on('admission_ready', done);
+        }
+    });
+}
+
+function postJSON(url, body) {
+    return fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    })
+    .then(response => response.json().then(data => {
+        if (response.status === 429 && data.queued) {
+            showToast(data.message, 'info');
+            return waitForTurn(data.retry_after).then(() => postJSON(url, body));
+        }
+        return data;
+    }));
+}
+
 // Smooth scroll to top
 function scrollToTop() {
     window.scrollTo({
@@ -126,6 +207,59 @@ function debounce(func, wait) {
     };
 }
 
+// Type-ahead for <input data-suggest="url" list="datalist-id">: fills the
+// datalist with the names the url returns for what has been typed
+function attachTypeahead(input) {
+    const list = document.getElementById(input.getAttribute('list'));
+    let latest = 0;
+    input.addEventListener('input', debounce(() => {
+        const query = input.value.trim();
+        if (query.length < 2) {
+            list.innerHTML = '';
+            return;
+        }
+        const request = ++latest;
+        fetch(`${input.dataset.suggest}?q=${encodeURIComponent(query)}`)
+            .then(response => response.json())
+            .then(data => {
+                if (request !== latest) return;  // A newer keystroke's answer wins
+                list.innerHTML = '';
+                data.suggestions.forEach(name => {
+                    const option = document.createElement('option');
+                    option.value = name;
+                    list.appendChild(option);
+                });
+            })
+            .catch(error => console.error('Suggest error:', error));
+    }, 150));
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('input[data-suggest]').forEach(attachTypeahead);
+});
+
+// Widgets that load after the page: fetch the element's data-widget url and
+// hand the JSON to render(data, element); pages start every widget at once
+function loadWidget(element, render) {
+    return fetch(element.dataset.widget, { credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.json();
+        })
+        .then(data => render(data, element))
+        .catch(error => {
+            console.error('Widget error:', element.dataset.widget, error);
+            element.innerHTML = '<p class="text-muted small mb-0">Could not load this section.</p>';
+        });
+}
+
+// Escape text for insertion into innerHTML
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
 // Print QR Code
 function printQRCode() {
     window.print();
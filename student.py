@@ -0,0 +1,402 @@
+"""
+Student blueprint: browsing menus, cart, checkout and order tracking
+"""
+
+from datetime import datetime
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify, session
+from flask_login import login_required, current_user
+from sqlalchemy import func
+from models import db, User, Category, MenuItem, Order, OrderItem, ArchivedOrder
+from utils import generate_order_number, get_available_time_slots, slot_deadline
+from auth import role_required
+from payments import get_gateway, mark_paid, hold_for_refund, to_paise
+from realtime import event_stream, user_room
+from fragment_cache import cache_version, bump_version
+from inventory import OutOfStock, reserve_stock
+from http_cache import conditional
+from jobs import enqueue
+from expiry import order_expiry
+from admission import admission_controlled
+from order_events import record_status
+from wait_times import slot_estimates, order_estimate
+from slot_recommender import slot_bookings, rank_slots, alternatives_for, slot_unavailable
+from menu_search import search_menu, suggest_menu
+from trending import CAMPUS, trending, trending_items
+from archive import get_student_order_history, count_student_orders
+from db_offload import run_in_db_thread, commit_session
+
+bp = Blueprint('student', __name__, url_prefix='/student')
+
+@bp.route('/home')
+@login_required
+@role_required('student')
+def student_home():
+    categories = Category.query  # Only executed when the cached grid is stale
+    
+    # Calculate sustainability impact for student
+    student_orders = count_student_orders(current_user.id)
+    waste_saved = student_orders * 0.25  # Estimate 250g per order
+    
+    # Trending across campus: the last hour, or today while the hour is quiet
+    trending_window = 'hour'
+    trending_now = trending_items(CAMPUS, 'hour', available_only=True)
+    if not trending_now:
+        trending_window = 'today'
+        trending_now = trending_items(CAMPUS, 'today', available_only=True)
+    
+    return render_template('student/home.html', 
+                         categories=categories,
+                         student_orders=student_orders,
+                         waste_saved=waste_saved,
+                         trending_now=trending_now,
+                         trending_window=trending_window)
+
+@bp.route('/category/<int:category_id>')
+@login_required
+@role_required('student')
+def category_menu(category_id):
+    category = Category.query.get_or_404(category_id)
+    # Only executed when the cached item grid is stale
+    menu_items = MenuItem.query.filter_by(category_id=category_id, is_available=True)
+    return render_template('student/category.html', category=category, menu_items=menu_items)
+
+@bp.route('/search')
+@login_required
+@role_required('student')
+def search():
+    query = request.args.get('q', '').strip()
+    results = search_menu(query) if query else []
+    return render_template('student/search.html', query=query, results=results)
+
+@bp.route('/search/suggest')
+@login_required
+@role_required('student')
+def search_suggest():
+    """Type-ahead: item names matching what has been typed so far"""
+    return jsonify({'suggestions': suggest_menu(request.args.get('q', ''))})
+
+def item_vendor():
+    """Admission key for add_to_cart: the vendor of the posted item"""
+    item_id = (request.get_json(silent=True) or {}).get('item_id')
+    return db.session.query(MenuItem.vendor_id).filter(MenuItem.id == item_id).scalar()
+
+def cart_vendor():
+    """Admission key for cart writes: the vendor of the items in the cart"""
+    cart = session.get('cart', {})
+    return next(iter(cart.values()))['vendor_id'] if cart else None
+
+@bp.route('/add-to-cart', methods=['POST'])
+@login_required
+@role_required('student')
+@admission_controlled(item_vendor)
+def add_to_cart():
+    data = request.get_json()
+    item_id = data.get('item_id')
+    quantity = data.get('quantity', 1)
+    
+    menu_item = MenuItem.query.get_or_404(item_id)
+    
+    # Initialize cart in session
+    if 'cart' not in session:
+        session['cart'] = {}
+    
+    cart = session['cart']
+    item_key = str(item_id)
+    
+    if item_key in cart:
+        cart[item_key]['quantity'] += quantity
+    else:
+        cart[item_key] = {
+            'id': item_id,
+            'name': menu_item.name,
+            'price': menu_item.price,
+            'quantity': quantity,
+            'vendor_id': menu_item.vendor_id
+        }
+    
+    session['cart'] = cart
+    session.modified = True
+    
+    return jsonify({'success': True, 'cart_count': len(cart)})
+
+@bp.route('/cart')
+@login_required
+@role_required('student')
+def view_cart():
+    cart = session.get('cart', {})
+    total = sum(item['price'] * item['quantity'] for item in cart.values())
+    time_slots = get_available_time_slots()
+    
+    # Rank the vendor's slots if cart has items
+    slot_availability = {}
+    recommended_slot = None
+    wait_estimates = {}
+    if cart:
+        vendor_id = list(cart.values())[0]['vendor_id']
+        vendor = User.query.get(vendor_id)
+        if vendor:
+            ranked = rank_slots(vendor_id, time_slots, vendor.get_slot_config())
+            slot_availability = {info['slot']: info for info in ranked}
+            if ranked[0]['available']:
+                recommended_slot = ranked[0]['slot']
+        wait_estimates = slot_estimates(vendor_id, time_slots)
+    
+    return render_template('student/cart.html', cart=cart, total=total, 
+                         time_slots=time_slots, slot_availability=slot_availability,
+                         recommended_slot=recommended_slot, wait_estimates=wait_estimates,
+                         selected_slot=session.get('slot_warning'))
+
+@bp.route('/update-cart', methods=['POST'])
+@login_required
+@role_required('student')
+@admission_controlled(cart_vendor)
+def update_cart():
+    data = request.get_json()
+    item_id = str(data.get('item_id'))
+    action = data.get('action')
+    
+    cart = session.get('cart', {})
+    
+    if item_id in cart:
+        if action == 'increase':
+            cart[item_id]['quantity'] += 1
+        elif action == 'decrease':
+            cart[item_id]['quantity'] -= 1
+            if cart[item_id]['quantity'] <= 0:
+                del cart[item_id]
+        elif action == 'remove':
+            del cart[item_id]
+    
+    session['cart'] = cart
+    session.modified = True
+    
+    total = sum(item['price'] * item['quantity'] for item in cart.values())
+    return jsonify({'success': True, 'total': total, 'cart_count': len(cart)})
+
+@bp.route('/checkout', methods=['POST'])
+@login_required
+@role_required('student')
+@admission_controlled(cart_vendor)
+def checkout():
+    cart = session.get('cart', {})
+    if not cart:
+        flash('Your cart is empty', 'warning')
+        return redirect(url_for('student.student_home'))
+    
+    pickup_time = request.form.get('pickup_time')
+    special_instructions = request.form.get('special_instructions', '')
+    payment_method = request.form.get('payment_method')
+    
+    if not pickup_time:
+        flash('Please select a pickup time', 'warning')
+        return redirect(url_for('student.view_cart'))
+    
+    time_slots = get_available_time_slots()
+    if pickup_time not in time_slots:
+        flash('That pickup time is no longer available. Please choose another.', 'warning')
+        return redirect(url_for('student.view_cart'))
+    
+    total_amount = sum(item['price'] * item['quantity'] for item in cart.values())
+    
+    # Get vendor_id from cart items (assuming all items from same vendor for MVP)
+    vendor_id = list(cart.values())[0]['vendor_id']
+    
+    # Check slot availability with the same rule the cart shows
+    vendor = User.query.get(vendor_id)
+    slot_config = vendor.get_slot_config() if vendor else {}
+    booked = Order.query.filter_by(vendor_id=vendor_id, pickup_time=pickup_time).filter(
+        Order.holding_slot(), Order.created_at >= datetime.now().date()).count()
+    unavailable = slot_unavailable(slot_config, pickup_time, booked)
+    if unavailable == 'Unavailable':
+        flash('Selected time slot is not available', 'warning')
+        return redirect(url_for('student.view_cart'))
+    if unavailable == 'Full':
+        flash('Selected time slot is full. Please choose another time.', 'warning')
+        return redirect(url_for('student.view_cart'))
+    
+    # Nearly full slot: point to better ones once, then take the student's choice
+    if session.get('slot_warning') != pickup_time:
+        alternatives = alternatives_for(rank_slots(vendor_id, time_slots, slot_config), pickup_time)
+        if alternatives:
+            session['slot_warning'] = pickup_time
+            flash(f"The {pickup_time} slot is almost full. {', '.join(alternatives)} should be quicker; "
+                  f"place the order again to keep {pickup_time}.", 'info')
+            return redirect(url_for('student.view_cart'))
+    session.pop('slot_warning', None)
+    
+    # Take stock atomically; rolled back with the order if anything fails
+    quantities = {}
+    for item in cart.values():
+        quantities[item['id']] = quantities.get(item['id'], 0) + item['quantity']
+    try:
+        stock_alerts, sold_out = run_in_db_thread(reserve_stock, quantities)
+    except OutOfStock as e:
+        db.session.rollback()
+        flash(f'Sorry, {e.item_name} just sold out. Please update your cart.', 'warning')
+        return redirect(url_for('student.view_cart'))
+    
+    # Create order
+    order_number = generate_order_number()
+    order = Order(
+        order_number=order_number,
+        student_id=current_user.id,
+        vendor_id=vendor_id,
+        total_amount=total_amount,
+        payment_method=payment_method,
+        pickup_time=pickup_time,
+        pickup_deadline=slot_deadline(pickup_time),
+        special_instructions=special_instructions,
+        payment_status='pending' if payment_method == 'online' else 'cod',
+        order_status='placed'
+    )
+    
+    db.session.add(order)
+    run_in_db_thread(db.session.flush)  # Get order ID
+    record_status(order.id, vendor_id, 'placed', pickup_time)
+    
+    # Add order items
+    for item in cart.values():
+        order_item = OrderItem(
+            order_id=order.id,
+            menu_item_id=item['id'],
+            quantity=item['quantity'],
+            price=item['price']
+        )
+        db.session.add(order_item)
+    
+    if payment_method == 'online':
+        # Create Razorpay order
+        order.razorpay_order_id = get_gateway().create_order(to_paise(total_amount), order_number)
+        # Settle the order with the gateway if the student never completes payment
+        enqueue('reconcile_payments',
+                delay=current_app.config['PAYMENT_PENDING_TIMEOUT_MINUTES'] * 60 + 30)
+        commit_session()
+        notify_stock_changes(stock_alerts, sold_out)
+        order_expiry.track(order.id, order.pickup_deadline)
+        slot_bookings.add(vendor_id, pickup_time)
+        # Trending counts the order once its payment settles (payments.mark_paid)
+        
+        return render_template('student/checkout.html', 
+                             order=order, 
+                             razorpay_key=current_app.config['RAZORPAY_KEY_ID'],
+                             razorpay_order_id=order.razorpay_order_id,
+                             amount_paise=to_paise(total_amount))
+    else:
+        # COD - QR code and capacity check are queued with the order
+        order.payment_status = 'cod'
+        enqueue('render_order_qr', {'order_id': order.id})
+        enqueue('check_slot_capacity', {'vendor_id': vendor_id, 'slot_time': pickup_time})
+        commit_session()
+        notify_stock_changes(stock_alerts, sold_out)
+        order_expiry.track(order.id, order.pickup_deadline)
+        slot_bookings.add(vendor_id, pickup_time)
+        trending.record(vendor_id, quantities)
+        
+        # Clear cart
+        session['cart'] = {}
+        session.modified = True
+        
+        # Notify vendor via SocketIO
+        event_stream.emit('new_order', {
+            'order_id': order.id,
+            'order_number': order_number,
+            'total_amount': total_amount,
+            'pickup_time': pickup_time
+        }, f'vendor_{vendor_id}')
+        
+        return redirect(url_for('student.order_success', order_id=order.id))
+
+@bp.route('/payment-success', methods=['POST'])
+@login_required
+@role_required('student')
+def payment_success():
+    data = request.get_json()
+    order_id = data.get('order_id')
+    payment_id = data.get('payment_id')
+    signature = data.get('signature')
+    
+    order = Order.query.get_or_404(order_id)
+    if order.student_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    # Only trust a payment id signed by the gateway for this order
+    if not payment_id or not get_gateway().verify_signature(order.razorpay_order_id, payment_id, signature):
+        return jsonify({'success': False, 'message': 'Payment could not be verified'}), 400
+    
+    # The reconciler may have settled the order already, or cancelled it once the payment window closed
+    rows = []
+    if order.payment_status == 'pending':
+        # QR code and capacity check run in the background
+        rows = mark_paid({order.id: payment_id})
+        db.session.commit()
+    elif order.payment_status != 'paid':
+        # Keep the payment on record so it is refunded, or reviewed if the refund fails
+        hold_for_refund(order.id, payment_id)
+        db.session.commit()
+        return jsonify({'success': False, 'message': 'This order expired before payment completed. '
+                                                     'Your payment will be refunded.'}), 409
+    
+    # Clear cart
+    session['cart'] = {}
+    session.modified = True
+    
+    # Notify vendor, unless a concurrent request already settled the order
+    if rows:
+        event_stream.emit('new_order', {
+            'order_id': order.id,
+            'order_number': order.order_number,
+            'total_amount': order.total_amount,
+            'pickup_time': order.pickup_time
+        }, f'vendor_{order.vendor_id}')
+    
+    return jsonify({'success': True, 'redirect_url': url_for('student.order_success', order_id=order.id)})
+
+def order_success_version(order_id):
+    """Validator for order_success: the order's last update and the student's event cursor"""
+    order = db.session.query(Order.student_id, Order.updated_at).filter(Order.id == order_id).first()
+    if not order or order.student_id != current_user.id:
+        return None
+    # The page embeds the event cursor, so it must change with every room event;
+    # that includes eta_update, so the embedded ready estimate never goes stale
+    cursor = event_stream.cursor(user_room(current_user))
+    return f'{order.updated_at.isoformat()}|{cache_version("menu")}|{cursor}', order.updated_at
+
+@bp.route('/order-success/<int:order_id>')
+@login_required
+@role_required('student')
+@conditional(order_success_version)
+def order_success(order_id):
+    order = Order.query.get_or_404(order_id)
+    if order.student_id != current_user.id:
+        flash('Unauthorized access', 'danger')
+        return redirect(url_for('student.student_home'))
+    return render_template('student/order_success.html', order=order, wait_estimate=order_estimate(order))
+
+def my_orders_version():
+    """Validator for my_orders: latest update and count across both stores"""
+    versions = [db.session.query(func.max(model.updated_at), func.count(model.id)).filter(
+        model.student_id == current_user.id).one() for model in (Order, ArchivedOrder)]
+    last_modified = max((v[0] for v in versions if v[0]), default=None)
+    count = sum(v[1] for v in versions)
+    return f'{last_modified}|{count}|{cache_version("menu")}', last_modified
+
+@bp.route('/my-orders')
+@login_required
+@role_required('student')
+@conditional(my_orders_version)
+def my_orders():
+    orders = get_student_order_history(current_user.id)
+    return render_template('student/my_orders.html', orders=orders)
+
+def notify_stock_changes(alerts, sold_out):
+    """Push low stock alerts to vendors and refresh menus after a committed checkout"""
+    if sold_out:
+        bump_version('menu')
+    for alert in alerts:
+        event_stream.emit('low_stock_alert', {
+            'item_id': alert['item_id'],
+            'name': alert['name'],
+            'stock': alert['stock'],
+            'threshold': alert['threshold'],
+            'message': f"{alert['name']} is running low ({alert['stock']} left)"
+        }, f"vendor_{alert['vendor_id']}")
@@ -0,0 +1,90 @@
+"""
+Background tasks run through the job queue (see jobs.py)
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import func
+from models import db, User, Order, OrderItem
+from jobs import task, enqueue
+from realtime import event_stream
+from fragment_cache import bump_version
+from utils import generate_qr_code
+from wait_times import order_estimates
+from trending import trending
+import payments
+
+@task(priority=10)
+def render_order_qr(order_id):
+    """Render an order's pickup QR code and tell the student it is ready"""
+    order = db.session.get(Order, order_id)
+    if order is None or order.qr_code_path:
+        return
+    order.qr_code_path = generate_qr_code(order.order_number, order.id)
+    # Worker processes have no SocketIO server; the web process relays the event
+    enqueue('emit_event', {
+        'event': 'qr_ready',
+        'data': {'order_id': order.id, 'qr_code_path': order.qr_code_path},
+        'room': f'student_{order.student_id}'
+    })
+
+@task(queue='web', priority=20)
+def emit_event(event, data, room):
+    """Send an event raised by a worker process to SocketIO clients"""
+    event_stream.emit(event, data, room)
+
+@task(queue='web', priority=20)
+def bump_cache_version(namespace):
+    """Invalidate the web process's cached fragments after a worker changed their data"""
+    bump_version(namespace)
+
+@task(queue='web')
+def record_trending(order_id):
+    """Count a paid online order in the trending sketches, which live in the web process"""
+    rows = db.session.query(Order.vendor_id, Order.created_at, OrderItem.menu_item_id,
+                            OrderItem.quantity).join(OrderItem).filter(Order.id == order_id).all()
+    if not rows:
+        return
+    quantities = {}
+    for row in rows:
+        quantities[row.menu_item_id] = quantities.get(row.menu_item_id, 0) + row.quantity
+    trending.record(rows[0].vendor_id, quantities,
+                    at=rows[0].created_at.replace(tzinfo=timezone.utc).timestamp())
+
+@task(queue='web', priority=20)
+def push_wait_estimates(vendor_id):
+    """Send updated ready-time estimates to the students waiting on a vendor"""
+    for order_id, student_id, estimate in order_estimates(vendor_id):
+        event_stream.emit('eta_update', dict(estimate, order_id=order_id), f'student_{student_id}')
+
+@task(priority=10)
+def refund_payment(order_id):
+    """Refund a payment that arrived after its order was cancelled (see payments.py)"""
+    payments.refund_payment(order_id)
+
+@task(max_attempts=1)
+def reconcile_payments():
+    """Settle stale pending online orders against the gateway (see payments.py)"""
+    payments.reconcile_payments()
+
+@task(queue='web')
+def check_slot_capacity(vendor_id, slot_time):
+    """Warn the vendor when a pickup slot is reaching capacity"""
+    slot_config = db.session.get(User, vendor_id).get_slot_config()
+    capacity = 20
+
+    if slot_time in slot_config:
+        capacity = slot_config[slot_time].get('capacity', 20)
+
+    booked = Order.query.filter_by(
+        vendor_id=vendor_id,
+        pickup_time=slot_time
+    ).filter(Order.holding_slot(), func.date(Order.created_at) == datetime.now().date()).count()
+
+    utilization = (booked / capacity) * 100 if capacity > 0 else 0
+
+    if utilization >= 90:
+        event_stream.emit('slot_capacity_warning', {
+            'slot_time': slot_time,
+            'utilization': round(utilization, 1),
+            'message': f'Slot {slot_time} is {round(utilization, 1)}% full!'
+        }, f'vendor_{vendor_id}')
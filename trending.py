@@ -0,0 +1,149 @@
+"""
+Trending items from bounded-memory heavy-hitter sketches
+Cash orders at checkout, and online orders once their payment settles,
+feed their items into Space-Saving sketches per vendor and campus-wide.
+A Space-Saving sketch keeps TRENDING_CAPACITY counters: an item without
+one takes over the smallest counter, inheriting its count as the item's
+possible overcount. Any item ordered more than total/capacity times is
+guaranteed a counter, so the true top items are always present.
+
+Two windows are kept per scope:
+
+- hour: six 10-minute sketches in a ring; reading merges the live ones
+- today: one sketch, started afresh at local midnight
+
+Memory is fixed at (vendors + 1) x 7 sketches x TRENDING_CAPACITY
+counters. Sketches live in each web process. The first read replays
+today's paid and cash orders from the database, so a restart loses
+nothing.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from flask import current_app
+from models import db, User, MenuItem, Order, OrderItem
+
+BUCKET_SECONDS = 600
+HOUR_BUCKETS = 6
+CAMPUS = 0  # Scope of the campus-wide sketches; vendor scopes use the vendor id
+PAID_STATUSES = ('paid', 'cod')  # Pending and failed online orders are not counted
+
+class SpaceSaving:
+    """Top-k counts over a stream of (item, weight) in capacity counters"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}  # item -> [count, overcount]
+
+    def add(self, item, weight=1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+        else:
+            smallest = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(smallest)[0]
+            self.counters[item] = [floor + weight, floor]
+
+    def top(self, n):
+        """[(item, count, overcount)], highest count first"""
+        ranked = sorted(self.counters.items(), key=lambda entry: -entry[1][0])[:n]
+        return [(item, count, overcount) for item, (count, overcount) in ranked]
+
+class TrendingTracker:
+    def __init__(self):
+        self.hour = defaultdict(dict)  # scope -> {bucket number: SpaceSaving}
+        self.today = {}  # scope -> SpaceSaving
+        self.day = None
+        self.warmed = False
+        self._lock = threading.Lock()
+
+    def _sketch(self):
+        return SpaceSaving(current_app.config['TRENDING_CAPACITY'])
+
+    def _roll(self, now):
+        """Drop sketches that fell out of their window"""
+        today = datetime.fromtimestamp(now).date()
+        if today != self.day:
+            self.day = today
+            self.today.clear()
+        oldest = int(now // BUCKET_SECONDS) - HOUR_BUCKETS + 1
+        for buckets in self.hour.values():
+            for bucket in [bucket for bucket in buckets if bucket < oldest]:
+                del buckets[bucket]
+
+    def _add(self, vendor_id, quantities, at, now):
+        bucket = int(at // BUCKET_SECONDS)
+        in_hour = bucket > int(now // BUCKET_SECONDS) - HOUR_BUCKETS
+        for scope in (vendor_id, CAMPUS):
+            today = self.today.get(scope) or self.today.setdefault(scope, self._sketch())
+            hour = None
+            if in_hour:
+                hour = self.hour[scope].get(bucket) or self.hour[scope].setdefault(bucket, self._sketch())
+            for item_id, quantity in quantities.items():
+                today.add(item_id, quantity)
+                if hour is not None:
+                    hour.add(item_id, quantity)
+
+    def record(self, vendor_id, quantities, at=None):
+        """Count a paid or cash order's {menu_item_id: quantity}"""
+        if not self.warmed:
+            self._warm()  # The replay already includes this order
+            return
+        now = time.time()
+        with self._lock:
+            self._roll(now)
+            self._add(vendor_id, quantities, now if at is None else at, now)
+
+    def _warm(self):
+        """Replay today's orders into the sketches, once per process"""
+        midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = db.session.query(Order.id, Order.vendor_id, Order.created_at, OrderItem.menu_item_id,
+                                OrderItem.quantity).join(OrderItem).filter(
+            Order.created_at >= midnight.astimezone(timezone.utc).replace(tzinfo=None),
+            Order.payment_status.in_(PAID_STATUSES)
+        ).order_by(Order.id).all()
+        orders = {}
+        for row in rows:
+            order = orders.setdefault(row.id, (row.vendor_id, row.created_at, defaultdict(int)))
+            order[2][row.menu_item_id] += row.quantity
+        now = time.time()
+        with self._lock:
+            if self.warmed:
+                return
+            self._roll(now)
+            for vendor_id, created_at, quantities in orders.values():
+                self._add(vendor_id, quantities, created_at.replace(tzinfo=timezone.utc).timestamp(), now)
+            self.warmed = True
+
+    def top(self, scope, window, n):
+        """[(menu_item_id, count)] for a vendor id or CAMPUS over 'hour' or 'today'"""
+        if not self.warmed:
+            self._warm()
+        with self._lock:
+            self._roll(time.time())
+            if window == 'today':
+                sketch = self.today.get(scope)
+                return [(item, count) for item, count, _ in sketch.top(n)] if sketch else []
+            merged = defaultdict(int)
+            for sketch in self.hour.get(scope, {}).values():
+                for item, (count, _) in sketch.counters.items():
+                    merged[item] += count
+        return sorted(merged.items(), key=lambda entry: -entry[1])[:n]
+
+trending = TrendingTracker()
+
+def trending_items(scope, window, n=5, available_only=False):
+    """Top items with their names and vendors: [{'id', 'name', 'vendor_name', 'count'}]"""
+    counts = trending.top(scope, window, n * 2 if available_only else n)
+    if not counts:
+        return []
+    query = db.session.query(MenuItem.id, MenuItem.name, MenuItem.is_available, User.full_name).join(
+        User, User.id == MenuItem.vendor_id).filter(MenuItem.id.in_([item for item, _ in counts]))
+    items = {row.id: row for row in query}
+    return [{'id': item_id, 'name': items[item_id].name, 'vendor_name': items[item_id].full_name, 'count': count}
+            for item_id, count in counts
+            if item_id in items and (items[item_id].is_available or not available_only)][:n]
@@ -1,9 +1,12 @@
-import qrcode
 import os
-from datetime import datetime, timedelta
+import csv
+import io
+from datetime import datetime, timedelta, timezone
 import random
 import string
 
+SLOT_MINUTES = 10  # Pickup slots are offered every 10 minutes
+
 def generate_order_number():
     """Generate unique order number"""
     timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
@@ -12,6 +15,8 @@ def generate_order_number():
 
 def generate_qr_code(order_number, order_id):
     """Generate QR code for order"""
+    import qrcode  # Pulls in PIL; only needed once an order is placed
+    
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -67,10 +72,37 @@ def get_available_time_slots():
     
     while current <= end_time:
         slots.append(current.strftime('%H:%M'))
-        current += timedelta(minutes=10)
+        current += timedelta(minutes=SLOT_MINUTES)
     
     return slots
 
+def slot_deadline(pickup_time, now=None):
+    """Naive UTC datetime of an 'HH:MM' pickup slot, on the day it was booked for
+    now is the local, timezone-aware booking time; slots are at most an hour
+    ahead, so one far behind it belongs to the next day.
+    """
+    now = now or datetime.now().astimezone()
+    hour, minute = map(int, pickup_time.split(':'))
+    slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if slot < now - timedelta(hours=12):
+        slot += timedelta(days=1)
+    return slot.astimezone(timezone.utc).replace(tzinfo=None)
+
+def generate_csv(header, rows, chunk_size=500):
+    """Yield CSV text in chunks so large exports never sit in memory"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    yield buffer.getvalue()
+
 def format_currency(amount):
     """Format amount in Indian Rupees"""
     return f'₹{amount:.2f}'
\ No newline at end of file
@@ -0,0 +1,483 @@
+"""
+Vendor blueprint: live orders, pickup verification, menu, slots and analytics
+"""
+
+from datetime import datetime
+from flask import (Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, abort,
+                   stream_with_context)
+from flask_login import login_required, current_user
+from sqlalchemy import func
+from models import db, User, Category, MenuItem, Order, RELEASED_ORDER_STATUSES
+from forms import MenuItemForm
+from utils import get_available_time_slots, generate_csv
+from auth import role_required
+from realtime import event_stream
+from expiry import order_expiry
+from order_events import record_status
+from wait_times import COMPLETED_STATUSES, QUEUED_STATUSES, order_completed
+from fragment_cache import bump_version
+from http_cache import json_response
+from inventory import release_stock, set_stock
+from menu_import import MenuImportError, parse_menu_file, import_menu
+from archive import get_archived_totals
+from db_offload import offload_db, commit_session
+from analytics import (ORDER_EXPORT_COLUMNS, get_order_export_rows, get_low_stock_items, get_peak_hours_today,
+                       get_peak_hours_weekly, get_slot_utilization, get_detailed_slot_utilization,
+                       calculate_waste_prevented, get_detailed_waste_metrics, get_popular_items,
+                       get_prep_latency)
+
+bp = Blueprint('vendor', __name__, url_prefix='/vendor')
+
+@bp.route('/dashboard')
+@login_required
+@role_required('vendor')
+@offload_db
+def vendor_dashboard():
+    today = datetime.now().date()
+    
+    # Basic stats
+    pending_orders = Order.query.filter_by(vendor_id=current_user.id, order_status='placed').count()
+    today_orders = Order.query.filter_by(vendor_id=current_user.id).filter(
+        func.date(Order.created_at) == today).count()
+    total_orders = Order.query.filter_by(vendor_id=current_user.id).count() + \
+        get_archived_totals(current_user.id)['order_count']
+    menu_items = MenuItem.query.filter_by(vendor_id=current_user.id).count()
+    
+    # Today's revenue
+    today_revenue = db.session.query(func.sum(Order.total_amount)).filter(
+        Order.vendor_id == current_user.id,
+        func.date(Order.created_at) == today,
+        Order.payment_status.in_(['paid', 'cod'])
+    ).scalar() or 0
+    
+    # Charts and metrics load afterwards from /vendor/widgets/<name>
+    return render_template('vendor/dashboard.html', 
+                         pending_orders=pending_orders,
+                         today_orders=today_orders,
+                         total_orders=total_orders,
+                         menu_items=menu_items,
+                         today_revenue=today_revenue)
+
+@bp.route('/orders')
+@login_required
+@role_required('vendor')
+@offload_db
+def vendor_orders():
+    status_filter = request.args.get('status', 'all')
+    query = Order.query.filter_by(vendor_id=current_user.id)
+    
+    if status_filter != 'all':
+        query = query.filter_by(order_status=status_filter)
+    
+    orders = query.order_by(Order.created_at.desc()).all()
+    return render_template('vendor/orders.html', orders=orders, status_filter=status_filter)
+
+@bp.route('/update-order-status', methods=['POST'])
+@login_required
+@role_required('vendor')
+def update_order_status():
+    data = request.get_json()
+    order_id = data.get('order_id')
+    new_status = data.get('status')
+    
+    order = Order.query.get_or_404(order_id)
+    
+    if order.vendor_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    # Cancelling returns the items to stock; an expired order's were already used up
+    restocked = False
+    if new_status == 'cancelled' and order.order_status not in RELEASED_ORDER_STATUSES:
+        restocked = release_stock(order.order_items)
+    
+    if new_status in COMPLETED_STATUSES and order.order_status in QUEUED_STATUSES:
+        order_completed(order.vendor_id)
+    if new_status != order.order_status:
+        record_status(order.id, order.vendor_id, new_status)
+    order.order_status = new_status
+    
+    if new_status == 'picked_up':
+        order.picked_up_at = datetime.utcnow()
+    
+    commit_session()
+    if restocked:
+        bump_version('menu')
+    if new_status in ('picked_up', 'cancelled'):
+        order_expiry.forget(order.id)
+    
+    # Notify student via SocketIO
+    event_stream.emit('order_status_update', {
+        'order_id': order.id,
+        'status': new_status,
+        'message': get_status_message(new_status)
+    }, f'student_{order.student_id}')
+    
+    return jsonify({'success': True})
+
+@bp.route('/verify-order-manual', methods=['POST'])
+@login_required
+@role_required('vendor')
+def verify_order_manual():
+    """Manual order verification by order number"""
+    data = request.get_json()
+    order_number = data.get('order_number', '').strip().upper()
+    
+    if not order_number:
+        return jsonify({'success': False, 'message': 'Please enter an order number'}), 400
+    
+    try:
+        # Find order by order number
+        order = Order.query.filter_by(order_number=order_number).first()
+        
+        if not order:
+            return jsonify({'success': False, 'message': 'Order not found. Please check the order number.'}), 404
+        
+        if order.vendor_id != current_user.id:
+            return jsonify({'success': False, 'message': 'This order is not for your outlet'}), 403
+        
+        if order.order_status == 'picked_up':
+            return jsonify({'success': False, 'message': 'This order has already been picked up'}), 400
+        
+        if order.order_status in QUEUED_STATUSES:  # Not cancelled, expired or already counted at 'ready'
+            order_completed(order.vendor_id)
+        
+        # Update order status
+        order.order_status = 'picked_up'
+        order.picked_up_at = datetime.utcnow()
+        record_status(order.id, order.vendor_id, 'picked_up')
+        commit_session()
+        order_expiry.forget(order.id)
+        
+        # Notify student
+        event_stream.emit('order_status_update', {
+            'order_id': order.id,
+            'status': 'picked_up',
+            'message': 'Order picked up successfully!'
+        }, f'student_{order.student_id}')
+        
+        return jsonify({
+            'success': True,
+            'message': 'Pickup confirmed!',
+            'order': {
+                'order_number': order.order_number,
+                'customer_name': order.customer.full_name,
+                'total_amount': order.total_amount
+            }
+        })
+        
+    except Exception as e:
+        print(f"Manual Verify Error: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error processing order verification'}), 500
+
+@bp.route('/scan-qr', methods=['POST'])
+@login_required
+@role_required('vendor')
+def scan_qr():
+    data = request.get_json()
+    qr_data = data.get('qr_data')
+    
+    try:
+        from utils import decode_qr_data
+        
+        # Decode QR data
+        result = decode_qr_data(qr_data)
+        if not result:
+            return jsonify({'success': False, 'message': 'Invalid QR code format'}), 400
+        
+        order_number, order_id = result
+        
+        # Get order from database
+        order = Order.query.get(order_id)
+        
+        if not order:
+            return jsonify({'success': False, 'message': 'Order not found'}), 400
+        
+        if order.order_number != order_number:
+            return jsonify({'success': False, 'message': 'Invalid QR code'}), 400
+        
+        if order.vendor_id != current_user.id:
+            return jsonify({'success': False, 'message': 'This order is not for your outlet'}), 403
+        
+        if order.order_status == 'picked_up':
+            return jsonify({'success': False, 'message': 'Order already picked up'}), 400
+        
+        if order.order_status in QUEUED_STATUSES:  # Not cancelled, expired or already counted at 'ready'
+            order_completed(order.vendor_id)
+        
+        # Update order status
+        order.order_status = 'picked_up'
+        order.picked_up_at = datetime.utcnow()
+        record_status(order.id, order.vendor_id, 'picked_up')
+        commit_session()
+        order_expiry.forget(order.id)
+        
+        # Notify student
+        event_stream.emit('order_status_update', {
+            'order_id': order.id,
+            'status': 'picked_up',
+            'message': 'Order picked up successfully!'
+        }, f'student_{order.student_id}')
+        
+        return jsonify({
+            'success': True, 
+            'message': 'Pickup confirmed!',
+            'order': {
+                'order_number': order.order_number,
+                'customer_name': order.customer.full_name,
+                'total_amount': order.total_amount
+            }
+        })
+        
+    except Exception as e:
+        print(f"QR Scan Error: {str(e)}")
+        return jsonify({'success': False, 'message': f'Error processing QR code: {str(e)}'}), 400
+
+@bp.route('/qr-scanner')
+@login_required
+@role_required('vendor')
+def qr_scanner():
+    return render_template('vendor/qr_scanner.html')
+
+@bp.route('/menu')
+@login_required
+@role_required('vendor')
+@offload_db
+def vendor_menu():
+    menu_items = MenuItem.query.filter_by(vendor_id=current_user.id).all()
+    return render_template('vendor/menu_management.html', menu_items=menu_items)
+
+@bp.route('/menu/add', methods=['GET', 'POST'])
+@login_required
+@role_required('vendor')
+def add_menu_item():
+    form = MenuItemForm()
+    form.category_id.choices = [(c.id, c.name) for c in Category.query.all()]
+    
+    if form.validate_on_submit():
+        menu_item = MenuItem(
+            name=form.name.data,
+            description=form.description.data,
+            price=form.price.data,
+            category_id=form.category_id.data,
+            vendor_id=current_user.id,
+            is_available=form.is_available.data
+        )
+        db.session.add(menu_item)
+        db.session.commit()
+        flash('Menu item added successfully', 'success')
+        return redirect(url_for('vendor.vendor_menu'))
+    
+    return render_template('vendor/menu_management.html', form=form, menu_items=[])
+
+@bp.route('/menu/toggle/<int:item_id>', methods=['POST'])
+@login_required
+@role_required('vendor')
+def toggle_menu_item(item_id):
+    item = MenuItem.query.get_or_404(item_id)
+    
+    if item.vendor_id != current_user.id:
+        return jsonify({'success': False}), 403
+    
+    item.is_available = not item.is_available
+    db.session.commit()
+    
+    return jsonify({'success': True, 'is_available': item.is_available})
+
+@bp.route('/menu/stock/<int:item_id>', methods=['POST'])
+@login_required
+@role_required('vendor')
+def update_menu_stock(item_id):
+    """Set stock on hand (typically each morning); null stops tracking"""
+    item = MenuItem.query.get_or_404(item_id)
+    
+    if item.vendor_id != current_user.id:
+        return jsonify({'success': False}), 403
+    
+    quantity = request.get_json().get('stock_quantity')
+    try:
+        quantity = None if quantity in (None, '') else int(quantity)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Stock must be a whole number'}), 400
+    if quantity is not None and quantity < 0:
+        return jsonify({'success': False, 'message': 'Stock cannot be negative'}), 400
+    
+    set_stock(item, quantity)
+    db.session.commit()
+
+    return jsonify({'success': True, 'stock_quantity': item.stock_quantity, 'is_available': item.is_available})
+
+@bp.route('/menu/import', methods=['POST'])
+@login_required
+@role_required('vendor')
+def import_menu_items():
+    """Bulk add or update menu items from an uploaded CSV or JSON file"""
+    upload = request.files.get('menu_file')
+    if not upload or not upload.filename.lower().endswith(('.csv', '.json')):
+        flash('Please upload a .csv or .json menu file', 'danger')
+        return redirect(url_for('vendor.vendor_menu'))
+
+    try:
+        rows = parse_menu_file(upload.stream, upload.filename)
+        result = import_menu(rows, vendor_id=current_user.id)
+    except MenuImportError as e:
+        db.session.rollback()
+        flash(f'Import failed, nothing was saved. {" ".join(e.errors[:5])}', 'danger')
+        return redirect(url_for('vendor.vendor_menu'))
+
+    flash(f"Menu imported: {result['created']} added, {result['updated']} updated", 'success')
+    return redirect(url_for('vendor.vendor_menu'))
+
+@bp.route('/analytics')
+@login_required
+@role_required('vendor')
+def vendor_analytics():
+    # Orders and revenue
+    recent_orders = Order.query.filter_by(vendor_id=current_user.id).order_by(
+        Order.created_at.desc()).limit(20).all()
+    total_orders = Order.query.filter_by(vendor_id=current_user.id).count()
+    total_revenue = db.session.query(func.sum(Order.total_amount)).filter(
+        Order.vendor_id == current_user.id,
+        Order.payment_status.in_(['paid', 'cod'])
+    ).scalar() or 0
+    
+    # Include archived orders in lifetime totals
+    archived = get_archived_totals(current_user.id)
+    total_orders += archived['order_count']
+    total_revenue += archived['revenue']
+    
+    # Charts and metrics load afterwards from /vendor/widgets/<name>
+    return render_template('vendor/analytics.html', 
+                         recent_orders=recent_orders,
+                         total_orders=total_orders,
+                         total_revenue=total_revenue)
+
+def hour_series(counts):
+    """[(hour, count)] as parallel arrays for a chart"""
+    counts = list(counts)
+    return {'hours': [hour for hour, _ in counts], 'counts': [count for _, count in counts]}
+
+def low_stock_widget(vendor_id):
+    items = get_low_stock_items(vendor_id)
+    return {'rows': [[item['name'], item['stock'], item['threshold']] for item in items]}
+
+def peak_hours_today_widget(vendor_id):
+    return hour_series(get_peak_hours_today(vendor_id).items())
+
+def peak_hours_week_widget(vendor_id):
+    return hour_series((row['hour'], row['count']) for row in get_peak_hours_weekly(vendor_id))
+
+def slot_utilization_widget(vendor_id):
+    slots = get_detailed_slot_utilization(vendor_id)
+    return {'rows': [[slot['time'], slot['capacity'], slot['booked'], slot['utilization']] for slot in slots]}
+
+def top_items_widget(vendor_id):
+    items = get_popular_items(vendor_id)
+    return {'names': [item['name'] for item in items], 'counts': [item['total_sold'] for item in items]}
+
+# name: (builder taking the vendor id, browser cache seconds); 0 revalidates on every load,
+# for widgets the dashboard reloads when an order arrives
+WIDGETS = {
+    'low-stock': (low_stock_widget, 0),
+    'peak-hours-today': (peak_hours_today_widget, 0),
+    'slot-stats': (get_slot_utilization, 0),
+    'waste-today': (calculate_waste_prevented, 0),
+    'peak-hours-week': (peak_hours_week_widget, 300),
+    'slot-utilization': (slot_utilization_widget, 60),
+    'top-items': (top_items_widget, 60),
+    'waste-week': (get_detailed_waste_metrics, 300),
+    'kitchen-latency': (get_prep_latency, 300)
+}
+
+@bp.route('/widgets/<name>')
+@login_required
+@role_required('vendor')
+def widget(name):
+    """Data for one dashboard or analytics widget, fetched by the page after it renders"""
+    if name not in WIDGETS:
+        abort(404)
+    build, max_age = WIDGETS[name]
+    return json_response(build(current_user.id), max_age)
+
+@bp.route('/export-orders')
+@login_required
+@role_required('vendor')
+def export_orders():
+    """Stream order history as CSV, one row per line item"""
+    status_filter = request.args.get('status', 'all')
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d') if request.args.get('end') else None
+    except ValueError:
+        flash('Invalid date range. Use YYYY-MM-DD.', 'warning')
+        return redirect(url_for('vendor.vendor_analytics'))
+    
+    rows = get_order_export_rows(current_user.id, start, end, status_filter)
+    filename = f'orders_{datetime.now().strftime("%Y%m%d")}.csv'
+    
+    return Response(stream_with_context(generate_csv(ORDER_EXPORT_COLUMNS, rows)),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@bp.route('/slot-management')
+@login_required
+@role_required('vendor')
+@offload_db
+def slot_management():
+    vendor = User.query.get(current_user.id)
+    slot_config = vendor.get_slot_config()
+    time_slots = get_available_time_slots()
+    
+    # Capacity suggestions from the latest demand forecast (imports NumPy, so loaded on first use)
+    from forecasting import get_capacity_suggestions
+    suggestions = get_capacity_suggestions(current_user.id, time_slots)
+    
+    return render_template('vendor/slot_management.html', 
+                         slot_config=slot_config,
+                         time_slots=time_slots,
+                         suggestions=suggestions)
+
+@bp.route('/update-slot-config', methods=['POST'])
+@login_required
+@role_required('vendor')
+def update_slot_config():
+    data = request.get_json()
+    slot_time = data.get('slot_time')
+    capacity = data.get('capacity')
+    blackout = data.get('blackout', False)
+    
+    vendor = User.query.get(current_user.id)
+    slot_config = vendor.get_slot_config()
+    
+    if slot_time not in slot_config:
+        slot_config[slot_time] = {}
+    
+    if capacity is not None:
+        slot_config[slot_time]['capacity'] = int(capacity)
+    
+    if blackout is not None:
+        slot_config[slot_time]['blackout'] = blackout
+    
+    vendor.set_slot_config(slot_config)
+    db.session.commit()
+    
+    # Notify about slot changes
+    event_stream.emit('slot_config_updated', {
+        'slot_time': slot_time,
+        'capacity': capacity,
+        'blackout': blackout
+    }, f'vendor_{current_user.id}')
+    
+    return jsonify({'success': True})
+
+def get_status_message(status):
+    """Get friendly status message"""
+    messages = {
+        'placed': 'Order placed successfully!',
+        'confirmed': 'Order confirmed by vendor',
+        'preparing': 'Your order is being prepared',
+        'ready': 'Your order is ready for pickup!',
+        'picked_up': 'Order picked up successfully',
+        'cancelled': 'Order cancelled',
+        'expired': 'Order expired: it was not collected in time'
+    }
+    return messages.get(status, 'Order status updated')
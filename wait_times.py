@@ -0,0 +1,125 @@
+"""
+Estimated ready times from kitchen throughput
+Each vendor's completions per minute are tracked as an exponentially
+weighted moving average: a completion (an order reaching 'ready', or
+'picked_up' without passing through 'ready') adds one to a counter that
+decays with time constant WAIT_EWMA_MINUTES. Dividing the open queue
+ahead of an order by that rate gives when the kitchen should get to it;
+an order is never estimated ready before its pickup slot.
+
+Counters live in the web process, which handles every status change, and
+are warmed from the order event log the first time a vendor is asked for.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import func
+from models import db, Order, OrderEvent
+from jobs import enqueue
+from utils import slot_deadline
+
+QUEUED_STATUSES = ('placed', 'confirmed', 'preparing')  # Not yet ready
+PAID_STATUSES = ('paid', 'cod')  # Unpaid online orders are not cooked
+COMPLETED_STATUSES = ('ready', 'picked_up')
+
+class ThroughputEstimator:
+    """Time-decayed completion counter per vendor"""
+
+    def __init__(self):
+        self._vendors = {}  # vendor_id -> [decayed completions, timestamp]
+        self._lock = threading.Lock()
+
+    def _tau(self):
+        return current_app.config['WAIT_EWMA_MINUTES'] * 60
+
+    def _state(self, vendor_id, now):
+        state = self._vendors.get(vendor_id)
+        if state is None:
+            state = self._vendors[vendor_id] = self._warm(vendor_id, now)
+        return state
+
+    def _warm(self, vendor_id, now):
+        """Replay recent completions from the event log"""
+        tau = self._tau()
+        since = datetime.utcnow() - timedelta(seconds=4 * tau)
+        # An order's first completion only: picked up after being ready counts once
+        completed = db.session.query(func.min(OrderEvent.at)).filter(
+            OrderEvent.vendor_id == vendor_id, OrderEvent.status.in_(COMPLETED_STATUSES), OrderEvent.at >= since
+        ).group_by(OrderEvent.order_id).all()
+        count = sum(math.exp(-(now - at.replace(tzinfo=timezone.utc).timestamp()) / tau) for at, in completed)
+        return [count, now]
+
+    def record_completion(self, vendor_id, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(vendor_id, now)
+            state[0] = state[0] * math.exp(-(now - state[1]) / self._tau()) + 1
+            state[1] = now
+
+    def rate(self, vendor_id, now=None):
+        """Orders completed per minute, never below WAIT_MIN_RATE
+        The floor keeps a quiet kitchen, which completes little because
+        little is ordered, from reading as a stalled one.
+        """
+        now = time.time() if now is None else now
+        tau = self._tau()
+        with self._lock:
+            count, stamp = self._state(vendor_id, now)
+        decayed = count * math.exp(-(now - stamp) / tau)
+        return max(decayed / (tau / 60), current_app.config['WAIT_MIN_RATE'])
+
+throughput = ThroughputEstimator()
+
+def order_completed(vendor_id):
+    """Count a completion and queue fresh estimates for the vendor's waiting students
+    Call before the completion's own order event is recorded, so a cold
+    counter warmed from the log does not count it twice.
+    """
+    throughput.record_completion(vendor_id)
+    enqueue('push_wait_estimates', {'vendor_id': vendor_id})
+
+def _local_time(utc_datetime):
+    return utc_datetime.replace(tzinfo=timezone.utc).astimezone().strftime('%H:%M')
+
+def _estimate(pickup_time, position, rate, now):
+    """Estimated ready time for the position-th order in the kitchen's queue"""
+    slot = slot_deadline(pickup_time)
+    ready = max(slot, now + timedelta(minutes=position / rate))
+    return {
+        'ready_at': _local_time(ready),
+        'late_minutes': max(0, round((ready - slot).total_seconds() / 60))
+    }
+
+def slot_estimates(vendor_id, slots):
+    """{slot: estimate} for a new order in each slot, behind the open queue due by then"""
+    queued = dict(db.session.query(Order.pickup_time, func.count(Order.id)).filter(
+        Order.vendor_id == vendor_id,
+        Order.order_status.in_(QUEUED_STATUSES),
+        Order.payment_status.in_(PAID_STATUSES)
+    ).group_by(Order.pickup_time).all())
+    rate = throughput.rate(vendor_id)
+    now = datetime.utcnow()
+    return {slot: _estimate(slot, sum(n for s, n in queued.items() if s <= slot) + 1, rate, now)
+            for slot in slots}
+
+def order_estimates(vendor_id):
+    """[(order_id, student_id, estimate)] for a vendor's queued orders, earliest slot first"""
+    orders = db.session.query(Order.id, Order.student_id, Order.pickup_time).filter(
+        Order.vendor_id == vendor_id,
+        Order.order_status.in_(QUEUED_STATUSES),
+        Order.payment_status.in_(PAID_STATUSES)
+    ).order_by(Order.pickup_time, Order.id).all()
+    rate = throughput.rate(vendor_id)
+    now = datetime.utcnow()
+    return [(order.id, order.student_id, _estimate(order.pickup_time, position, rate, now))
+            for position, order in enumerate(orders, 1)]
+
+def order_estimate(order):
+    """Estimate for one order, or None once it is ready or closed"""
+    for order_id, _, estimate in order_estimates(order.vendor_id):
+        if order_id == order.id:
+            return estimate
+    return None